@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import math
+import multiprocessing
+import os
+import numpy as np
+from sweep import run_point
+
+
+def t_quantile(p, dof):
+    # Student t quantile. scipy comes with qiskit, it is imported here to keep it out of startup.
+    if dof < 1:
+        return math.inf
+
+    from scipy.stats import t
+    return float(t.ppf(p, dof))
+
+
+class RunningStats:
+    # Welford's online mean and variance
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta/self.n
+        self._m2 += delta*(value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2/(self.n - 1) if self.n > 1 else math.inf
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def half_width(self, confidence=0.95):
+        # Half width of the confidence interval on the mean
+        if self.n < 2:
+            return math.inf
+        return t_quantile(0.5 + confidence/2, self.n - 1)*self.std/math.sqrt(self.n)
+
+
+class AdaptiveRuns:
+    # Repeats one configuration until the confidence interval on metric is at most target_width wide,
+    # with at least min_runs and at most max_runs runs
+    def __init__(self, system_parameters, simulate_parameters, metric, target_width, confidence=0.95, min_runs=5, max_runs=1000, max_workers=None, seed=None):
+        self.system_parameters = system_parameters
+        self.simulate_parameters = simulate_parameters
+        self.metric = metric
+        self.target_width = target_width
+        self.confidence = confidence
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.max_workers = max_workers
+        self.seed = seed
+        self.stats = RunningStats()
+        self.abort = False
+
+    def converged(self):
+        return self.stats.n >= self.min_runs and 2*self.stats.half_width(self.confidence) <= self.target_width
+
+    def run(self):
+        # Yields (run index, results, stats) as runs finish. Runs still in flight at convergence are dropped.
+        seeds = np.random.SeedSequence(self.seed)
+        workers = self.max_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+        try:
+            pending = set()
+            submitted = 0
+            finished = 0
+
+            while not self.abort and not self.converged() and finished < self.max_runs:
+                while len(pending) < workers and submitted < self.max_runs:
+                    seed = int(seeds.spawn(1)[0].generate_state(1)[0])
+                    pending.add(executor.submit(run_point, self.system_parameters, self.simulate_parameters, None, None, seed))
+                    submitted += 1
+
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None and result.get(self.metric) is not None:
+                        self.stats.add(result[self.metric])
+
+                    yield finished, result, self.stats
+                    finished += 1
+
+                    if self.converged() or self.abort:
+                        break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
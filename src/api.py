@@ -0,0 +1,73 @@
+import csv
+import json
+import numpy as np
+from system import System
+from sweep import Sweep, ExpectedSweep
+
+
+def simulate(system_parameters, simulate_parameters, cache=None, expected=False):
+    # cache is a ResultCache, only seeded runs are looked up and stored. expected gives the
+    # closed-form expected values instead of a sampled run.
+    if expected:
+        return System(**system_parameters).expected(**simulate_parameters)
+
+    results = cache.get(system_parameters, simulate_parameters) if cache is not None else None
+    if results is None:
+        results = System(**system_parameters).simulate(**simulate_parameters)
+        if cache is not None:
+            cache.put(system_parameters, simulate_parameters, results)
+    return results
+
+
+def sweep(system_parameters, simulate_parameters, x_param_name, x_param_values, max_workers=None, seed=None, cache=None, expected=False):
+    # Rows come back in sweep order even though points finish out of order
+    rows = [None]*len(x_param_values)
+
+    if expected:
+        points = ExpectedSweep(system_parameters, simulate_parameters, x_param_name, x_param_values)
+    else:
+        points = Sweep(system_parameters, simulate_parameters, x_param_name, x_param_values, max_workers, seed, cache)
+
+    for i, x_param_value, result in points.run():
+        rows[i] = {"Sweep parameter": x_param_name, "Sweep value": x_param_value, **result}
+
+    return rows
+
+
+def to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {key: to_builtin(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(val) for val in value]
+    return value
+
+
+def flatten(row, prefix=""):
+    # Nested sections such as Timings become one column per leaf, "Timings encode Wall time (s)"
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix + key + " "))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+def write_results(rows, path):
+    rows = to_builtin(rows)
+
+    if path.endswith(".csv"):
+        rows = [flatten(row) for row in rows]
+        # Rows can have different stages in their timings, take every column any row has
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=4)
@@ -1,6 +1,5 @@
-from qiskit import *
-import numpy as np
 from protocol import Protocol
+from bits import Bits
 
 
 class B92(Protocol):
@@ -8,75 +7,45 @@ class B92(Protocol):
     ENTANGLEMENT = False
 
     def encode_message(system):
-        system._message = list(np.random.randint(2, size=system._n_bits))
-        system._qubits = []
-        for i in range(len(system._message)):
-            qc = QuantumCircuit(1,1)
+        system._message = Bits.random(system._n_bits, system.rng("message"))
+        system._qubits = system.allocate_qubits(1)
 
-            if system._message[i] == 0:
-                pass
-
-            elif system._message[i] == 1:
-                qc.h(0)
-
-            system._qubits.append(qc)
+        system._qubits.h(0, system._message.mask())
 
 
     def measure_qubits(system):
-        system._b_bases = list(np.random.randint(2, size=system._n_bits))
-        backend = Aer.get_backend('aer_simulator')
-        system._measured = []
-        for q in range(len(system._qubits)):
-            if system._qubits[q] is None:
-                system._measured.append(None)
-                continue
+        system._b_bases = Bits.random(system._n_bits, system.rng("bob bases"))
 
-            if system._b_bases[q] == 0: # measuring in Z-basis
-                system._qubits[q].measure(0,0)
-            if system._b_bases[q] == 1: # measuring in X-basis
-                system._qubits[q].h(0)
-                system._qubits[q].measure(0,0)
-            aer_sim = Aer.get_backend('aer_simulator')
-            qobj = assemble(system._qubits[q], shots=1, memory=True)
-            result = aer_sim.run(qobj).result()
-            measured_bit = int(result.get_memory()[0])
-            system._measured.append(measured_bit)
+        system._qubits.h(0, system._b_bases.mask()) # measuring in X-basis
+        system._measured = Bits.pack(system._qubits.measure())
 
 
     def find_keys(system):
-        system._a_key = []
-        system._b_key = []
-        for i, (base, measurement) in enumerate(zip(system._b_bases, system._measured)):
-            if base == 0 and measurement == 1:
-                system._a_key.append(system._message[i])
-                system._b_key.append(1)
-            elif base == 1 and measurement == 1:
-                system._a_key.append(system._message[i])
-                system._b_key.append(0)
-
-
-    def cross_check(system, fraction):
-        check_size = int(len(system._a_key)*fraction) + 1
-
-        check_indexes = np.random.choice([i for i in range(len(system._a_key))], check_size)
-
-        a_check = [system._a_key[i] for i in check_indexes]
-        b_check = [system._b_key[i] for i in check_indexes]
-
-        num_matches = len([i for i, j in zip(a_check, b_check) if i == j])
+        # Only a click is conclusive, it rules out the state that never clicks in that basis:
+        # a click in Z means Alice sent |+> (1), a click in X means she sent |0> (0)
+        sifted = system._measured.mask()
+        system._sifted = system._measured
+        system._a_key = system._message[sifted]
+        system._b_key = Bits.pack(1 - system._b_bases.unpack()[sifted])
 
-        system._a_key = [val for i, val in enumerate(system._a_key) if i not in check_indexes]
-        system._b_key = [val for i, val in enumerate(system._b_key) if i not in check_indexes]
 
-        return 1 - num_matches/check_size
-    
-    
     def eavesdrop(system):
-        for qc in system._qubits:
-            if np.random.random() < 0.5:
-                if np.random.random() < 0.5:
-                    qc.x(0)
-                    qc.h(0)
-                    qc.x(0)
-                else:
-                    qc.h(0)
\ No newline at end of file
+        intercepted = Bits.random(system._n_bits, system.rng("eavesdropper bases")).mask()
+        flipped = intercepted & Bits.random(system._n_bits, system.rng("eavesdropper bits")).mask()
+
+        system._qubits.x(0, flipped)
+        system._qubits.h(0, intercepted)
+        system._qubits.x(0, flipped)
+
+
+    def expected_rates(cos, sin, eavesdrop):
+        # A quarter of the pulses are conclusive without noise. A rotation by theta adds conclusive
+        # results with probability sin^2(theta/2)/2, all of them wrong. Intercepted pulses are
+        # conclusive half the time and wrong half of that.
+        error = (1 - cos)/2
+        conclusive = (1 + 2*error)/4
+        wrong = error/2
+        if eavesdrop:
+            conclusive = 1/4 + conclusive/2
+            wrong = 1/8 + wrong/2
+        return conclusive, wrong/conclusive, None
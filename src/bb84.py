@@ -1,7 +1,5 @@
-from qiskit import *
-import numpy as np
 from protocol import Protocol
-import tools as Tools
+from bits import Bits
 
 
 class BB84(Protocol):
@@ -9,61 +7,42 @@ class BB84(Protocol):
     ENTANGLEMENT = False
 
     def encode_message(system):
-        system._message = list(np.random.randint(2, size=system._n_bits))
-        system._a_bases = list(np.random.randint(2, size=system._n_bits))
-        system._qubits = []
-        for i in range(len(system._message)):
-            qc = QuantumCircuit(1,1)
-            if system._a_bases[i] == 0: # Prepare qubits in Z-basis
-                if system._message[i] == 0:
-                    pass 
-                else:
-                    qc.x(0)
-            else: # Prepare qubits in X-basis
-                if system._message[i] == 0:
-                    qc.h(0)
-                else:
-                    qc.x(0)
-                    qc.h(0)
-            system._qubits.append(qc)
+        system._message = Bits.random(system._n_bits, system.rng("message"))
+        system._a_bases = Bits.random(system._n_bits, system.rng("alice bases"))
+        system._qubits = system.allocate_qubits(1)
+
+        system._qubits.x(0, system._message.mask())
+        system._qubits.h(0, system._a_bases.mask()) # Prepare qubits in X-basis
 
 
     def measure_qubits(system):
-        system._b_bases = list(np.random.randint(2, size=system._n_bits))
-        backend = Aer.get_backend('aer_simulator')
-        system._measured = []
-        for q in range(len(system._qubits)):
-            if system._qubits[q] is None:
-                system._measured.append(None)
-                continue
+        system._b_bases = Bits.random(system._n_bits, system.rng("bob bases"))
+
+        system._qubits.h(0, system._b_bases.mask()) # measuring in X-basis
+        system._measured = Bits.pack(system._qubits.measure())
 
-            if system._b_bases[q] == 0: # measuring in Z-basis
-                system._qubits[q].measure(0,0)
-            if system._b_bases[q] == 1: # measuring in X-basis
-                system._qubits[q].h(0)
-                system._qubits[q].measure(0,0)
-            aer_sim = Aer.get_backend('aer_simulator')
-            qobj = assemble(system._qubits[q], shots=1, memory=True)
-            result = aer_sim.run(qobj).result()
-            measured_bit = int(result.get_memory()[0])
-            system._measured.append(measured_bit)
-    
 
     def find_keys(system):
-        system._a_key = []
-        system._b_key = []
-        for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)):
-            if a_base == b_base and system._measured[i] is not None:
-                system._a_key.append(system._message[i])
-                system._b_key.append(system._measured[i])
-    
+        # Keep the pulses measured in the basis they were prepared in
+        sifted = (system._a_bases ^ system._b_bases).unpack() == 0
+        system._sifted = Bits.pack(sifted)
+        system._a_key = system._message[sifted]
+        system._b_key = system._measured[sifted]
+
 
     def eavesdrop(system):
-        for qc in system._qubits:
-            if np.random.random() < 0.5:
-                if np.random.random() < 0.5:
-                    qc.x(0)
-                    qc.h(0)
-                    qc.x(0)
-                else:
-                    qc.h(0)
\ No newline at end of file
+        intercepted = Bits.random(system._n_bits, system.rng("eavesdropper bases")).mask()
+        flipped = intercepted & Bits.random(system._n_bits, system.rng("eavesdropper bits")).mask()
+
+        system._qubits.x(0, flipped)
+        system._qubits.h(0, intercepted)
+        system._qubits.x(0, flipped)
+
+
+    def expected_rates(cos, sin, eavesdrop):
+        # Matching bases keep half the pulses. A rotation by theta flips the bit with probability
+        # sin^2(theta/2) in either basis and an intercepted pulse is random in Bob's basis.
+        qber = (1 - cos)/2
+        if eavesdrop:
+            qber = 1/4 + qber/2
+        return 1/2, qber, None
@@ -1,69 +1,50 @@
-from qiskit import *
-import numpy as np
 from protocol import Protocol
-import tools as Tools
+from bits import Bits
 
 class BBM92(Protocol):
     NAME = "BBM92"
     ENTANGLEMENT = True
 
     def encode_message(system):
-        system._qubits = []
-        for i in range(system._n_bits):
-            qc = QuantumCircuit(2,2)
-            
-            # Create bell state
-            qc.h(0)
-            qc.cx(0,1)
-            system._qubits.append(qc)
+        system._qubits = system.allocate_qubits(2)
+
+        # Create bell state
+        system._qubits.h(0)
+        system._qubits.cx(0,1)
+
 
-    
     def measure_qubits(system):
-        system._a_bases = list(np.random.randint(2, size=system._n_bits))
-        system._b_bases = list(np.random.randint(2, size=system._n_bits))
-        backend = Aer.get_backend('aer_simulator')
-        system._measured = []
-        for q in range(len(system._qubits)):
-            if system._qubits[q] is None:
-                system._measured.append(None)
-                continue
+        system._a_bases = Bits.random(system._n_bits, system.rng("alice bases"))
+        system._b_bases = Bits.random(system._n_bits, system.rng("bob bases"))
 
-            if system._a_bases[q] == 0: # measuring in Z-basis
-                system._qubits[q].measure(0,0)
-            if system._a_bases[q] == 1: # measuring in X-basis
-                system._qubits[q].h(0)
-                system._qubits[q].measure(0,0)
-            
-            if system._b_bases[q] == 0: # measuring in Z-basis
-                system._qubits[q].measure(1,1)
-            if system._b_bases[q] == 1: # measuring in X-basis
-                system._qubits[q].h(1)
-                system._qubits[q].measure(1,1)
-            
+        # measuring in X-basis
+        system._qubits.h(0, system._a_bases.mask())
+        system._qubits.h(1, system._b_bases.mask())
 
-            aer_sim = Aer.get_backend('aer_simulator')
-            qobj = assemble(system._qubits[q], shots=1, memory=True)
-            result = aer_sim.run(qobj).result()
-            measured_bits = result.get_memory()
-            measured_bits = [int(i) for i in measured_bits[0]]
+        system._measured = Bits.pack(system._qubits.measure())
 
-            system._measured.append(measured_bits)
 
-    
     def find_keys(system):
-        system._a_key = []
-        system._b_key = []
-        for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)):
-            if a_base == b_base and system._measured[i] is not None:
-                system._a_key.append(system._measured[i][0])
-                system._b_key.append(system._measured[i][1])
-    
-    
+        # Keep the pairs both sides measured in the same basis
+        sifted = (system._a_bases ^ system._b_bases).unpack() == 0
+        system._sifted = Bits.pack(sifted)
+        measured = system._measured.unpack()[sifted]
+        system._a_key = Bits.pack(measured[:, 0])
+        system._b_key = Bits.pack(measured[:, 1])
+
+
     def eavesdrop(system):
-        for qc in system._qubits:
-            qc.reset(0)
-            qc.reset(1)
+        system._qubits.reset(0)
+        system._qubits.reset(1)
+
+        flipped = Bits.random(system._n_bits, system.rng("eavesdropper bits")).mask()
+        system._qubits.x(0, flipped)
+        system._qubits.x(1, flipped)
+
 
-            if np.random.random() < 0.5:
-                qc.x(0)
-                qc.x(1)
\ No newline at end of file
+    def expected_rates(cos, sin, eavesdrop):
+        # Independent rotations of the arms act on the pair as one rotation by their difference.
+        # The eavesdropper's product states agree in Z and are random in X.
+        if eavesdrop:
+            return 1/2, 1/4, None
+        return 1/2, (1 - cos**2 - sin**2)/2, None
@@ -0,0 +1,167 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from system import System
+
+PROTOCOLS = ["BB84", "B92", "BBM92", "E91"]
+SIZES = [10**k for k in range(2, 7)]
+STAGES = ["encode", "mess_with", "eavesdrop", "measure", "find_keys", "test_statistic", "cross_check"]
+
+# Stages faster than this are noise, they never count as regressions
+NOISE_FLOOR = 1e-3
+
+
+def make_system(protocol, n_bits, engine, seed):
+    system = System(protocol, 18, 0.53, 0.05, 72.6e6, 0.13, 0.11, 0.058, engine=engine, seed=seed)
+    system._n_bits = n_bits
+    return system
+
+
+def stages(system):
+    protocol = system._protocol
+    return [
+        ("encode", system.encode),
+        ("mess_with", system.mess_with),
+        ("eavesdrop", system.eavesdrop),
+        ("measure", system.measure),
+        ("find_keys", system.find_keys),
+        ("test_statistic", lambda: protocol.test_statistic(system, protocol.statistic_counts(system))),
+        ("cross_check", lambda: system.cross_check(0.1) if len(system._a_key) > 0 else None)
+    ]
+
+
+def run_stages(protocol, n_bits, engine, seed, trace_memory):
+    # Runs the pipeline once, returns {stage: seconds} or {stage: peak bytes} with trace_memory
+    system = make_system(protocol, n_bits, engine, seed)
+    measured = {}
+
+    for name, stage in stages(system):
+        if trace_memory:
+            tracemalloc.start()
+            stage()
+            measured[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            stage()
+            measured[name] = time.perf_counter() - start
+
+    return measured
+
+
+def benchmark(protocols=PROTOCOLS, sizes=SIZES, engine="analytic", repeats=3, seed=0):
+    results = []
+
+    for protocol in protocols:
+        for n_bits in sizes:
+            # Best of repeats for time, memory is traced in a separate run since tracing slows the Python loops
+            times = [run_stages(protocol, n_bits, engine, seed, False) for i in range(repeats)]
+            memory = run_stages(protocol, n_bits, engine, seed, True)
+
+            for stage in STAGES:
+                seconds = min(t[stage] for t in times)
+                results.append({
+                    "protocol": protocol,
+                    "n_bits": n_bits,
+                    "stage": stage,
+                    "seconds": seconds,
+                    "peak_bytes": memory[stage],
+                    "qubits_per_second": n_bits/seconds if seconds > 0 else None
+                })
+                print("{:6} {:>8} {:15} {:10.4f} s {:10.1f} MiB".format(protocol, n_bits, stage, seconds, memory[stage]/2**20), file=sys.stderr)
+
+    return {
+        "engine": engine,
+        "repeats": repeats,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results
+    }
+
+
+def compare(current, baseline, tolerance):
+    # Returns the rows slower than tolerance times their baseline
+    previous = {(r["protocol"], r["n_bits"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+
+    for row in current["results"]:
+        old = previous.get((row["protocol"], row["n_bits"], row["stage"]))
+        if old is None or max(row["seconds"], old["seconds"]) < NOISE_FLOOR:
+            continue
+
+        ratio = row["seconds"]/max(old["seconds"], 1e-9)
+        if ratio > tolerance:
+            regressions.append(dict(row, baseline_seconds=old["seconds"], ratio=ratio))
+
+    return regressions
+
+
+def plot(report, path):
+    # Time and memory against n_bits on log axes, one panel per protocol
+    from matplotlib import pyplot as plt
+
+    protocols = list(dict.fromkeys(r["protocol"] for r in report["results"]))
+    fig, axes = plt.subplots(2, len(protocols), figsize=(4*len(protocols), 7), squeeze=False)
+
+    for column, protocol in enumerate(protocols):
+        for stage in STAGES:
+            rows = [r for r in report["results"] if r["protocol"] == protocol and r["stage"] == stage]
+            sizes = [r["n_bits"] for r in rows]
+            axes[0][column].loglog(sizes, [max(r["seconds"], 1e-7) for r in rows], marker="o", label=stage)
+            axes[1][column].loglog(sizes, [max(r["peak_bytes"], 1) for r in rows], marker="o", label=stage)
+
+        axes[0][column].set_title(protocol)
+        axes[1][column].set_xlabel("Number of qubits")
+
+    axes[0][0].set_ylabel("Time (s)")
+    axes[1][0].set_ylabel("Peak memory (bytes)")
+    axes[0][-1].legend(fontsize="small")
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time and trace memory of every simulation stage across protocols and sizes.")
+    parser.add_argument("--protocols", nargs="+", choices=PROTOCOLS, default=PROTOCOLS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="Numbers of qubits")
+    parser.add_argument("--engine", choices=["aer", "lookup", "analytic", "statevector"], default="analytic")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", default=None, help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", default=None, help="JSON baseline to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Slowdown over the baseline that counts as a regression")
+    parser.add_argument("--plot", default=None, help="Save time and memory scaling curves to this image")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    # The stages print progress of their own, keep stdout for the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = benchmark(args.protocols, args.sizes, args.engine, args.repeats, args.seed)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.plot:
+        plot(report, args.plot)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args.tolerance)
+        for row in regressions:
+            print("REGRESSION {protocol} {n_bits} {stage}: {seconds:.4f} s vs {baseline_seconds:.4f} s ({ratio:.2f}x)".format(**row))
+        print("{} regressions against {}".format(len(regressions), args.compare))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
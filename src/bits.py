@@ -0,0 +1,74 @@
+import numpy as np
+
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Bits:
+    # Bit-packed 0/1 values, one bit per pulse, packed along the first axis so pair
+    # measurements keep one packed column per arm. Padding bits are always zero.
+    __slots__ = ("packed", "n")
+
+    def __init__(self, packed, n):
+        self.packed = packed
+        self.n = n
+
+    @staticmethod
+    def pack(bits):
+        bits = np.asarray(bits, dtype=np.uint8)
+        return Bits(np.packbits(bits, axis=0), len(bits))
+
+    @staticmethod
+    def random(n, rng):
+        packed = np.frombuffer(rng.bytes((n + 7)//8), dtype=np.uint8).copy()
+        if n % 8:
+            packed[-1] &= (0xFF << (8 - n % 8)) & 0xFF
+        return Bits(packed, n)
+
+    @staticmethod
+    def concatenate(parts):
+        if not parts:
+            return Bits.pack(np.zeros(0, dtype=np.uint8))
+
+        # Joins the packed bytes, a part starting mid-byte is split across two output bytes.
+        # Padding bits are zero, so they never spill into the next part.
+        n = sum(part.n for part in parts)
+        packed = np.zeros(((n + 7)//8,) + parts[0].packed.shape[1:], dtype=np.uint8)
+        offset = 0
+        for part in parts:
+            byte, shift = divmod(offset, 8)
+            size = (part.n + 7)//8
+            if shift == 0:
+                packed[byte:byte + size] = part.packed[:size]
+            else:
+                packed[byte:byte + size] |= part.packed[:size] >> shift
+                end = min(byte + 1 + size, len(packed))
+                packed[byte + 1:end] |= (part.packed[:end - byte - 1] << (8 - shift)).astype(np.uint8)
+            offset += part.n
+        return Bits(packed, n)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self.n
+            if not 0 <= index < self.n:
+                raise IndexError("Bit index out of range")
+            bit = (self.packed[index >> 3] >> (7 - (index & 7))) & 1
+            return int(bit) if np.ndim(bit) == 0 else bit
+        return Bits.pack(self.unpack()[index])
+
+    def __xor__(self, other):
+        return Bits(self.packed ^ other.packed, self.n)
+
+    def unpack(self):
+        return np.unpackbits(self.packed, axis=0, count=self.n)
+
+    def mask(self):
+        return self.unpack().view(bool)
+
+    def count(self):
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(self.packed).sum())
+        return int(POPCOUNT[self.packed].sum())
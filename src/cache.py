@@ -0,0 +1,177 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+from lookup import CACHE_DIR
+from system import System
+
+
+def to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError("Cannot store {} in the result cache".format(type(value).__name__))
+
+
+def engine_version(engine):
+    # Aer results change with the simulator, the other engines only with this code
+    if engine != "aer":
+        return str(System.VERSION)
+
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        return "{}-aer{}".format(System.VERSION, version("qiskit-aer"))
+    except PackageNotFoundError:
+        return str(System.VERSION)
+
+
+class ResultCache:
+    # Results of seeded runs, keyed by every System and simulate argument plus the engine version.
+    # Unseeded runs are random draws and are never cached.
+    COLUMNS = ["protocol", "engine", "n_bits", "seed", "parameter", "value"]
+
+    # simulate options that only measure the run, they are left out of the key
+    PROFILING = ("trace_memory", "profile_path")
+
+    def __init__(self, path=os.path.join(CACHE_DIR, "results.sqlite"), max_bytes=256*2**20, max_age=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                protocol TEXT, engine TEXT, n_bits INTEGER, seed TEXT, parameter TEXT, value REAL,
+                arguments TEXT, results TEXT, size INTEGER, created REAL, accessed REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_sweep ON results (protocol, engine, parameter)")
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def arguments(system_parameters, simulate_parameters, x_param_name=None, x_param_value=None):
+        # Fill in defaults so an omitted argument and its default value share a key
+        system = inspect.signature(System).bind(**system_parameters)
+        system.apply_defaults()
+        simulate = inspect.signature(System.simulate).bind(None, **simulate_parameters)
+        simulate.apply_defaults()
+
+        return {
+            "system": dict(system.arguments),
+            "simulate": {name: value for name, value in simulate.arguments.items() if name != "self" and name not in ResultCache.PROFILING},
+            "parameter": x_param_name,
+            "value": x_param_value,
+            "version": engine_version(system.arguments["engine"])
+        }
+
+    @staticmethod
+    def cacheable(system_parameters):
+        return isinstance(system_parameters.get("seed"), (int, np.integer))
+
+    @staticmethod
+    def key(arguments):
+        encoded = json.dumps(arguments, sort_keys=True, default=to_json)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def get(self, system_parameters, simulate_parameters, x_param_name=None, x_param_value=None):
+        # A requested profile has to come from this run, so the run is never skipped. Its results
+        # are still stored.
+        if not ResultCache.cacheable(system_parameters) or simulate_parameters.get("profile_path"):
+            return None
+
+        key = ResultCache.key(ResultCache.arguments(system_parameters, simulate_parameters, x_param_name, x_param_value))
+        row = self._db.execute("SELECT results, created FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if self.max_age is not None and time.time() - row[1] > self.max_age:
+            return None
+
+        self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+
+        # The stored timings were measured by the original run, not this one
+        results = json.loads(row[0])
+        results.pop("Timings", None)
+        results["Cached"] = True
+        return results
+
+    def put(self, system_parameters, simulate_parameters, results, x_param_name=None, x_param_value=None):
+        if not ResultCache.cacheable(system_parameters) or results is None:
+            return
+
+        arguments = ResultCache.arguments(system_parameters, simulate_parameters, x_param_name, x_param_value)
+        encoded_arguments = json.dumps(arguments, sort_keys=True, default=to_json)
+        encoded_results = json.dumps(results, default=to_json)
+        now = time.time()
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                ResultCache.key(arguments),
+                arguments["system"]["protocol"],
+                arguments["system"]["engine"],
+                int(arguments["simulate"]["n_bits"]),
+                # Seeds of unseeded runs are 128-bit entropies, too large for an SQLite INTEGER
+                str(int(arguments["system"]["seed"])),
+                x_param_name,
+                None if x_param_value is None else float(x_param_value),
+                encoded_arguments,
+                encoded_results,
+                len(encoded_arguments) + len(encoded_results),
+                now,
+                now
+            )
+        )
+        self._db.commit()
+        self.evict()
+
+    def evict(self):
+        if self.max_age is not None:
+            self._db.execute("DELETE FROM results WHERE created < ?", (time.time() - self.max_age,))
+
+        # Drop the least recently used entries until the cache fits
+        if self.max_bytes is not None:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                freed = 0
+                for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+                    if total - freed <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    freed += size
+
+        self._db.commit()
+
+    def query(self, fields=None, **filters):
+        # Past results as columns, {field: [values]}, filtered on the indexed columns,
+        # e.g. query(["Sweep value", "QBER"], protocol="BB84", parameter="Fiber length")
+        unknown = set(filters) - set(ResultCache.COLUMNS)
+        if unknown:
+            raise Exception("Cannot filter cached results on: {}".format(", ".join(sorted(unknown))))
+
+        if "seed" in filters:
+            filters["seed"] = str(int(filters["seed"]))
+
+        where = " AND ".join("{} = ?".format(name) for name in filters) or "1"
+        rows = self._db.execute(
+            "SELECT parameter, value, results FROM results WHERE {} ORDER BY protocol, engine, parameter, value, created".format(where),
+            tuple(filters.values())
+        ).fetchall()
+
+        records = [{"Sweep parameter": parameter, "Sweep value": value, **json.loads(results)} for parameter, value, results in rows]
+        if fields is None:
+            fields = list(dict.fromkeys(field for record in records for field in record))
+        return {field: [record.get(field) for record in records] for field in fields}
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -0,0 +1,91 @@
+import math
+import numpy as np
+from bits import Bits
+
+
+class Cascade:
+    # Block size of the first pass relative to the QBER, doubled every pass after that
+    BLOCK_FACTOR = 0.73
+
+    def __init__(self, passes=4, rng=None):
+        self.passes = passes
+        self._rng = np.random.default_rng(rng)
+        self.rounds = 0
+        self.leaked_bits = 0
+
+    def block_size(self, n, qber):
+        if qber <= 0:
+            return max(n, 1)
+        return min(max(math.ceil(Cascade.BLOCK_FACTOR/qber), 2), max(n, 1))
+
+    def bisect(self, errors, order, k, blocks):
+        # Binary search all odd blocks of one pass at once. Each row holds the error pattern of
+        # one block in pass order, the cumulative XOR gives the parity of every prefix.
+        n = len(errors)
+        starts = blocks*k
+        lengths = np.minimum(k, n - starts)
+
+        offsets = np.arange(k)
+        positions = np.minimum(starts[:, None] + offsets, n - 1)
+        rows = np.where(offsets < lengths[:, None], errors[order[positions]], 0).astype(np.uint8)
+
+        prefix = np.zeros((len(blocks), k + 1), dtype=np.uint8)
+        np.bitwise_xor.accumulate(rows, axis=1, out=prefix[:, 1:])
+
+        index = np.arange(len(blocks))
+        low = np.zeros(len(blocks), dtype=np.int64)
+        high = lengths.astype(np.int64)
+
+        active = high - low > 1
+        while active.any():
+            middle = (low + high)//2
+            # Alice reveals the parity of the left half of every block still being searched
+            left_odd = (prefix[index, middle] ^ prefix[index, low]).astype(bool)
+            self.leaked_bits += int(np.count_nonzero(active))
+
+            high = np.where(active & left_odd, middle, high)
+            low = np.where(active & ~left_odd, middle, low)
+            active = high - low > 1
+
+        return order[starts + low]
+
+    def reconcile(self, a_key, b_key, qber):
+        self.leaked_bits = 0
+        self.rounds = 0
+
+        errors = (a_key ^ b_key).unpack()
+        n = len(errors)
+        if n == 0:
+            return b_key
+
+        first_size = self.block_size(n, qber)
+        passes = []
+
+        for i in range(self.passes):
+            k = min(first_size << i, n)
+            order = np.arange(n) if i == 0 else self._rng.permutation(n)
+            position = np.empty(n, dtype=np.int64)
+            position[order] = np.arange(n)
+
+            # Alice reveals the parity of every block of the new pass
+            odd = np.bitwise_xor.reduceat(errors[order], np.arange(0, n, k)).astype(bool)
+            self.leaked_bits += len(odd)
+            passes.append((order, position, k, odd))
+            self.rounds += 1
+
+            # Every corrected bit flips the parity of the block holding it in each earlier pass,
+            # keep searching until no pass has an odd block left
+            while True:
+                pending = [p for p in passes if p[3].any()]
+                if not pending:
+                    break
+
+                p_order, p_position, p_k, p_odd = pending[0]
+                found = self.bisect(errors, p_order, p_k, np.flatnonzero(p_odd))
+                errors[found] ^= 1
+
+                for p_order, p_position, p_k, p_odd in passes:
+                    flips = np.bincount(p_position[found]//p_k, minlength=len(p_odd)) & 1
+                    p_odd ^= flips.astype(bool)
+
+        return Bits.pack(a_key.unpack() ^ errors)
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import time
+
+# Import budgets in seconds, measured in a fresh interpreter, best of REPEATS
+BUDGETS = {
+    "system": 0.6,
+    "api": 0.6,
+    "cli": 0.6,
+}
+REPEATS = 3
+
+# Modules that must stay out of a cold import, they load only in the stage that needs them
+HEAVY_MODULES = ["qiskit", "qiskit_aer", "matplotlib", "pandas", "PyQt5", "scipy"]
+
+
+def import_time(module):
+    times = []
+    for i in range(REPEATS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import " + module], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def heavy_imports(module):
+    code = "import sys, {}; print(' '.join(m for m in {} if m in sys.modules))".format(module, HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return output.stdout.split()
+
+
+def main():
+    baseline = import_time("numpy")
+    failed = False
+
+    for module, budget in BUDGETS.items():
+        elapsed = import_time(module)
+        heavy = heavy_imports(module)
+        ok = elapsed <= budget and not heavy
+        failed = failed or not ok
+
+        print("{:8} {:.3f} s (budget {:.3f} s, numpy alone {:.3f} s) {}{}".format(
+            module, elapsed, budget, baseline, "ok" if ok else "FAILED", ", loads " + ", ".join(heavy) if heavy else ""
+        ))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import contextlib
+import json
+import sys
+import numpy as np
+import api
+
+X_PARAMETERS = [
+    "Fiber length",
+    "Fiber loss",
+    "Source generation rate",
+    "Source efficiency",
+    "Detector efficiency",
+    "Perturb probability",
+    "SOP mean deviation",
+    "Cross check fraction"
+]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run QKD simulations without the GUI. Units match the GUI fields.")
+
+    parser.add_argument("--protocol", choices=["BB84", "B92", "E91", "BBM92"], default="BB84")
+    parser.add_argument("--qubits", type=int, default=1000000, help="Number of qubits sent")
+    parser.add_argument("--fiber-length", type=float, default=18.0, help="km")
+    parser.add_argument("--fiber-loss", type=float, default=0.53, help="dB/km")
+    parser.add_argument("--perturb-probability", type=float, default=5.0, help="%%")
+    parser.add_argument("--generation-rate", type=float, default=72.6, help="MHz")
+    parser.add_argument("--sop-deviation", type=float, default=0.13, help="SOP mean deviation (rad)")
+    parser.add_argument("--detector-efficiency", type=float, default=11.0, help="%%")
+    parser.add_argument("--source-efficiency", type=float, default=5.8, help="%%")
+    parser.add_argument("--cross-check", type=float, default=10.0, help="Cross check fraction (%%)")
+
+    parser.add_argument("--losses", action="store_true")
+    parser.add_argument("--perturb", action="store_true")
+    parser.add_argument("--uncertainty", action="store_true")
+    parser.add_argument("--eavesdrop", action="store_true")
+    parser.add_argument("--reconciliation", choices=["cascade", "ldpc"], default=None, help="Correct the sifted keys after the cross check")
+    parser.add_argument("--privacy-amplification", action="store_true", help="Hash the key down to its secret length")
+    parser.add_argument("--expected", action="store_true", help="Closed-form expected key length, key rate, QBER and S instead of sampling")
+
+    parser.add_argument("--engine", choices=["aer", "lookup", "analytic", "statevector"], default="aer")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--memory-budget", type=int, default=None, help="Bytes per simulation chunk")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run or sweep")
+
+    parser.add_argument("--sweep", choices=X_PARAMETERS, default=None, help="Parameter to sweep, in the units above")
+    parser.add_argument("--start", type=float, default=None)
+    parser.add_argument("--end", type=float, default=None)
+    parser.add_argument("--points", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for sweeps")
+
+    parser.add_argument("--trace-memory", action="store_true", help="Add tracemalloc peaks to the per-stage timings")
+    parser.add_argument("--profile", default=None, metavar="PATH", help="Dump cProfile stats of the run (single runs only)")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="PATH", help="Reuse results of seeded runs from an SQLite cache (default under ~/.cache/qkd-simulations)")
+
+    parser.add_argument("--output", default=None, help="Results file, .csv or .json (JSON on stdout if omitted)")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    system_parameters = dict(
+        protocol=args.protocol,
+        fiber_length=args.fiber_length,
+        fiber_loss=args.fiber_loss,
+        perturb_probability=args.perturb_probability/100,
+        generation_rate=args.generation_rate*1e6,
+        uncertainty_mean=args.sop_deviation,
+        detector_efficiency=args.detector_efficiency/100,
+        source_efficiency=args.source_efficiency/100,
+        engine=args.engine,
+        batch_size=args.batch_size,
+        memory_budget=args.memory_budget
+    )
+    simulate_parameters = dict(
+        n_bits=args.qubits,
+        perturb=args.perturb,
+        cross_check_fraction=args.cross_check/100,
+        losses=args.losses,
+        eavesdrop=args.eavesdrop,
+        add_uncertainty=args.uncertainty,
+        reconciliation=args.reconciliation,
+        privacy_amplification=args.privacy_amplification,
+        trace_memory=args.trace_memory
+    )
+
+    cache = None
+    if args.cache is not None:
+        from cache import ResultCache
+        cache = ResultCache(args.cache) if args.cache else ResultCache()
+
+    # The simulation reports progress on stdout, keep it free for the JSON results
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.sweep:
+            if args.start is None or args.end is None:
+                raise SystemExit("--sweep needs --start and --end")
+            x_param_values = np.linspace(args.start, args.end, args.points)
+            rows = api.sweep(system_parameters, simulate_parameters, args.sweep, x_param_values, args.workers, args.seed, cache, args.expected)
+        else:
+            rows = [api.simulate(dict(system_parameters, seed=args.seed), dict(simulate_parameters, profile_path=args.profile), cache, args.expected)]
+
+    if args.output:
+        api.write_results(rows, args.output)
+    else:
+        print(json.dumps(api.to_builtin(rows), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,78 @@
-from qiskit import *
 import numpy as np
 from protocol import Protocol
-import tools as Tools
+from bits import Bits
 
 class E91(Protocol):
     NAME = "E91"
     ENTANGLEMENT = True
 
     def encode_message(system):
-        system._qubits = []
-        for i in range(system._n_bits):
-            qc = QuantumCircuit(2,2)
-            
-            # Create bell state
-            qc.h(0)
-            qc.cx(0,1)
-            system._qubits.append(qc)
-
-    
+        system._qubits = system.allocate_qubits(2)
+
+        # Create bell state
+        system._qubits.h(0)
+        system._qubits.cx(0,1)
+
+
     def measure_qubits(system):
-        system._a_bases = list(np.random.randint(3, size=system._n_bits)/8)
-        system._b_bases = list(np.random.randint(3, size=system._n_bits)/8 + 1/8)
-        backend = Aer.get_backend('aer_simulator')
-        system._measured = []
-        for q in range(len(system._qubits)):
-            if system._qubits[q] is None:
-                system._measured.append(None)
-                continue
-
-            if system._a_bases[q] == 0:
-                system._qubits[q].measure(0,0)
-            elif system._a_bases[q] == 1/8:
-                system._qubits[q].ry(-2*np.pi/8, 0)
-                system._qubits[q].measure(0,0) 
-            elif system._a_bases[q] == 2/8:
-                system._qubits[q].ry(-2*np.pi/4, 0)
-                system._qubits[q].measure(0,0)
-            
-            if system._b_bases[q] == 1/8:
-                system._qubits[q].ry(-2*np.pi/8, 1)
-                system._qubits[q].measure(1,1)
-            elif system._b_bases[q] == 2/8:
-                system._qubits[q].ry(-2*np.pi/4, 1)
-                system._qubits[q].measure(1,1)
-            elif system._b_bases[q] == 3/8:
-                system._qubits[q].ry(-2*3*np.pi/8, 1)
-                system._qubits[q].measure(1,1)
-            
-
-            aer_sim = Aer.get_backend('aer_simulator')
-            qobj = assemble(system._qubits[q], shots=1, memory=True)
-            result = aer_sim.run(qobj).result()
-            measured_bits = result.get_memory()
-            measured_bits = [int(i) for i in measured_bits[0]]
-
-            system._measured.append(measured_bits)
-
-    
+        # Analyzer angles in units of pi/8: Alice 0, pi/8, pi/4 and Bob pi/8, pi/4, 3pi/8
+        system._a_bases = system.rng("alice bases").integers(3, size=system._n_bits).astype(np.uint8)
+        system._b_bases = system.rng("bob bases").integers(3, size=system._n_bits).astype(np.uint8) + 1
+
+        system._qubits.ry(-np.pi/4*system._a_bases, 0, system._a_bases != 0)
+        system._qubits.ry(-np.pi/4*system._b_bases, 1)
+
+        system._measured = Bits.pack(system._qubits.measure())
+
+
     def find_keys(system):
-        system._a_key = []
-        system._b_key = []
-        for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)):
-            if a_base == b_base and system._measured[i] is not None:
-                system._a_key.append(system._measured[i][0])
-                system._b_key.append(system._measured[i][1])
-    
-    
+        # Keep the pairs measured with the same analyzer, pi/8 or pi/4
+        sifted = system._a_bases == system._b_bases
+        system._sifted = Bits.pack(sifted)
+        measured = system._measured.unpack()[sifted]
+        system._a_key = Bits.pack(measured[:, 0])
+        system._b_key = Bits.pack(measured[:, 1])
+
+
     def eavesdrop(system):
-        for qc in system._qubits:
-            qc.reset(0)
-            qc.reset(1)
-
-            if np.random.random() < 0.5:
-                qc.x(0)
-                qc.x(1)
-
-    def test_statistic(system):
-        def E_value(measurements):
-            N11 = sum([1 for i in measurements if i == [1,1]])
-            N00 = sum([1 for i in measurements if i == [0,0]])
-            N01 = sum([1 for i in measurements if i == [0,1]])
-            N10 = sum([1 for i in measurements if i == [1,0]])
-            return (N11 + N00 - N01 - N10)/len(measurements)
-        
-        term1 = E_value([system._measured[i] for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)) if a_base == 0 and b_base == 1/8])
-        term2 = E_value([system._measured[i] for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)) if a_base == 0 and b_base == 3/8])
-        term3 = E_value([system._measured[i] for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)) if a_base == 1/4 and b_base == 1/8])
-        term4 = E_value([system._measured[i] for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)) if a_base == 1/4 and b_base == 3/8])
-        
-        return term1 - term2 + term3 + term4
\ No newline at end of file
+        system._qubits.reset(0)
+        system._qubits.reset(1)
+
+        flipped = Bits.random(system._n_bits, system.rng("eavesdropper bits")).mask()
+        system._qubits.x(0, flipped)
+        system._qubits.x(1, flipped)
+
+    def statistic_counts(system):
+        # Contingency table [Alice analyzer, Bob analyzer - 1, Alice bit, Bob bit] from one bincount.
+        # Tables of separate chunks add up, so S can be estimated from a streamed run.
+        measured = system._measured.unpack()
+        index = ((system._a_bases.astype(np.intp)*3 + system._b_bases - 1)*2 + measured[:, 0])*2 + measured[:, 1]
+        return np.bincount(index, minlength=36).reshape(3, 3, 2, 2)
+
+    def correlators(counts):
+        # E(a, b) = P(equal) - P(different) for every pair of analyzers, nan for pairs never measured
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (counts[..., 0, 0] + counts[..., 1, 1] - counts[..., 0, 1] - counts[..., 1, 0])/counts.sum(axis=(2, 3))
+
+    def test_statistic(system, counts=None):
+        # No pairs got through, there is nothing to test
+        if counts is None:
+            if system._measured is None:
+                return None
+            counts = E91.statistic_counts(system)
+        if counts.sum() == 0:
+            return None
+
+        # CHSH over Alice 0, pi/4 and Bob pi/8, 3pi/8
+        E = E91.correlators(counts)
+        return E[0, 0] - E[0, 2] + E[2, 0] + E[2, 2]
+
+
+    def expected_rates(cos, sin, eavesdrop):
+        # Keys come from the matching analyzers pi/8 and pi/4, 2 of the 9 pairs. Every correlator is
+        # the ideal one scaled by E[cos(theta_b - theta_a)]. Against product states from an
+        # eavesdropper E(a, b) = cos(2a)cos(2b), so S drops to sqrt(2).
+        if eavesdrop:
+            return 2/9, 3/8, np.sqrt(2)
+        visibility = cos**2 + sin**2
+        return 2/9, (1 - visibility)/2, 2*np.sqrt(2)*visibility
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class Executor:
+    # Aer seeds the i-th experiment of a job with seed_simulator + i*SEED_STRIDE,
+    # so seeding every block at its offset reproduces one job over all circuits
+    SEED_STRIDE = 2113
+
+    _backend = None
+    _native_gates = None
+
+    def __init__(self, batch_size=1024, cache_size=4096):
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._transpiled = OrderedDict()
+
+    @staticmethod
+    def backend():
+        if Executor._backend is None:
+            from qiskit_aer import AerSimulator
+            Executor._backend = AerSimulator()
+            Executor._native_gates = set(Executor._backend.configuration().basis_gates) | {"measure", "reset", "barrier"}
+        return Executor._backend
+
+    def prepare(self, tape, i):
+        qc = tape.circuit(i)
+        Executor.backend()
+        if all(gate.operation.name in Executor._native_gates for gate in qc.data):
+            return qc
+
+        key = tape.key(i)
+        if key in self._transpiled:
+            self._transpiled.move_to_end(key)
+            return self._transpiled[key]
+
+        from qiskit import transpile
+        transpiled = transpile(qc, Executor.backend(), optimization_level=0)
+        self._transpiled[key] = transpiled
+        if len(self._transpiled) > self.cache_size:
+            self._transpiled.popitem(last=False)
+        return transpiled
+
+    def run(self, tape, rng=None):
+        seed = int(np.random.default_rng(rng).integers(2**30))
+        measured = np.zeros((len(tape), tape.n_qubits), dtype=np.uint8)
+
+        for start in range(0, len(tape), self.batch_size):
+            block = range(start, min(start + self.batch_size, len(tape)))
+            result = Executor.backend().run(
+                [self.prepare(tape, i) for i in block],
+                shots=1,
+                memory=True,
+                seed_simulator=seed + start*Executor.SEED_STRIDE
+            ).result()
+
+            for j, i in enumerate(block):
+                # Memory strings are little-endian, reverse so column k holds clbit k
+                measured[i] = [int(bit) for bit in reversed(result.get_memory(j)[0])]
+
+        return measured
@@ -654,6 +654,25 @@ class Ui_Window(object):
         self.sourceEfficiency.setProperty("value", 5.8)
         self.sourceEfficiency.setObjectName("sourceEfficiency")
         self.gridLayout.addWidget(self.sourceEfficiency, 2, 1, 1, 1)
+        self.label_34 = QtWidgets.QLabel(self.gridLayoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_34.setFont(font)
+        self.label_34.setObjectName("label_34")
+        self.gridLayout.addWidget(self.label_34, 8, 3, 1, 1)
+        self.seed = QtWidgets.QSpinBox(self.gridLayoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        font.setWeight(75)
+        self.seed.setFont(font)
+        self.seed.setMinimum(-1)
+        self.seed.setMaximum(2147483647)
+        self.seed.setProperty("value", -1)
+        self.seed.setObjectName("seed")
+        self.gridLayout.addWidget(self.seed, 8, 4, 1, 1)
         self.progressBar = QtWidgets.QProgressBar(self.gridLayoutWidget)
         font = QtGui.QFont()
         font.setPointSize(12)
@@ -662,7 +681,7 @@ class Ui_Window(object):
         self.progressBar.setFont(font)
         self.progressBar.setProperty("value", 100)
         self.progressBar.setObjectName("progressBar")
-        self.gridLayout.addWidget(self.progressBar, 8, 0, 1, 7)
+        self.gridLayout.addWidget(self.progressBar, 9, 0, 1, 7)
         self.abortButtonSingle = QtWidgets.QPushButton(self.gridLayoutWidget)
         self.abortButtonSingle.setEnabled(True)
         font = QtGui.QFont()
@@ -671,7 +690,7 @@ class Ui_Window(object):
         font.setWeight(75)
         self.abortButtonSingle.setFont(font)
         self.abortButtonSingle.setObjectName("abortButtonSingle")
-        self.gridLayout.addWidget(self.abortButtonSingle, 8, 7, 1, 1)
+        self.gridLayout.addWidget(self.abortButtonSingle, 9, 7, 1, 1)
         self.tabWidget.addTab(self.tab, "")
         self.tab_2 = QtWidgets.QWidget()
         self.tab_2.setObjectName("tab_2")
@@ -791,7 +810,7 @@ class Ui_Window(object):
         self.multiProgressBar.setFont(font)
         self.multiProgressBar.setProperty("value", 100)
         self.multiProgressBar.setObjectName("multiProgressBar")
-        self.gridLayout_2.addWidget(self.multiProgressBar, 7, 0, 1, 4)
+        self.gridLayout_2.addWidget(self.multiProgressBar, 9, 0, 1, 4)
         self.multiRunButton = QtWidgets.QPushButton(self.gridLayoutWidget_2)
         font = QtGui.QFont()
         font.setPointSize(12)
@@ -799,7 +818,7 @@ class Ui_Window(object):
         font.setWeight(75)
         self.multiRunButton.setFont(font)
         self.multiRunButton.setObjectName("multiRunButton")
-        self.gridLayout_2.addWidget(self.multiRunButton, 6, 0, 1, 1)
+        self.gridLayout_2.addWidget(self.multiRunButton, 8, 0, 1, 1)
         self.startValue = QtWidgets.QDoubleSpinBox(self.gridLayoutWidget_2)
         font = QtGui.QFont()
         font.setPointSize(12)
@@ -825,7 +844,7 @@ class Ui_Window(object):
         self.line.setFrameShape(QtWidgets.QFrame.VLine)
         self.line.setFrameShadow(QtWidgets.QFrame.Sunken)
         self.line.setObjectName("line")
-        self.gridLayout_2.addWidget(self.line, 1, 2, 6, 1)
+        self.gridLayout_2.addWidget(self.line, 1, 2, 8, 1)
         self.multiPlot = QtWidgets.QLabel(self.gridLayoutWidget_2)
         font = QtGui.QFont()
         font.setPointSize(12)
@@ -833,7 +852,7 @@ class Ui_Window(object):
         self.multiPlot.setText("")
         self.multiPlot.setScaledContents(True)
         self.multiPlot.setObjectName("multiPlot")
-        self.gridLayout_2.addWidget(self.multiPlot, 1, 3, 6, 1)
+        self.gridLayout_2.addWidget(self.multiPlot, 1, 3, 8, 1)
         self.abortButton = QtWidgets.QPushButton(self.gridLayoutWidget_2)
         self.abortButton.setEnabled(True)
         font = QtGui.QFont()
@@ -842,7 +861,42 @@ class Ui_Window(object):
         font.setWeight(75)
         self.abortButton.setFont(font)
         self.abortButton.setObjectName("abortButton")
-        self.gridLayout_2.addWidget(self.abortButton, 6, 1, 1, 1)
+        self.gridLayout_2.addWidget(self.abortButton, 8, 1, 1, 1)
+        self.label_32 = QtWidgets.QLabel(self.gridLayoutWidget_2)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_32.setFont(font)
+        self.label_32.setObjectName("label_32")
+        self.gridLayout_2.addWidget(self.label_32, 6, 0, 1, 1)
+        self.ciTargetWidth = QtWidgets.QDoubleSpinBox(self.gridLayoutWidget_2)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        font.setWeight(75)
+        self.ciTargetWidth.setFont(font)
+        self.ciTargetWidth.setDecimals(4)
+        self.ciTargetWidth.setMaximum(999999999.0)
+        self.ciTargetWidth.setObjectName("ciTargetWidth")
+        self.gridLayout_2.addWidget(self.ciTargetWidth, 6, 1, 1, 1)
+        self.label_33 = QtWidgets.QLabel(self.gridLayoutWidget_2)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_33.setFont(font)
+        self.label_33.setObjectName("label_33")
+        self.gridLayout_2.addWidget(self.label_33, 7, 0, 1, 1)
+        self.expectedValues = QtWidgets.QCheckBox(self.gridLayoutWidget_2)
+        font = QtGui.QFont()
+        font.setPointSize(12)
+        font.setBold(False)
+        font.setWeight(50)
+        self.expectedValues.setFont(font)
+        self.expectedValues.setText("")
+        self.expectedValues.setObjectName("expectedValues")
+        self.gridLayout_2.addWidget(self.expectedValues, 7, 1, 1, 1)
         self.tabWidget.addTab(self.tab_2, "")
         Window.setCentralWidget(self.centralwidget)
         self.statusbar = QtWidgets.QStatusBar(Window)
@@ -937,6 +991,10 @@ class Ui_Window(object):
         self.sourceEfficiency.setToolTip(_translate("Window", "<html><head/><body><p>The efficiency of the source.</p></body></html>"))
         self.sourceEfficiency.setSuffix(_translate("Window", " %"))
         self.abortButtonSingle.setText(_translate("Window", "Abort"))
+        self.label_34.setToolTip(_translate("Window", "<html><head/><body><p>With a seed the runs and sweeps repeat exactly and are stored in the result cache, a rerun comes back from the cache. None draws fresh randomness every run.</p></body></html>"))
+        self.label_34.setText(_translate("Window", "Seed"))
+        self.seed.setToolTip(_translate("Window", "<html><head/><body><p>With a seed the runs and sweeps repeat exactly and are stored in the result cache, a rerun comes back from the cache. None draws fresh randomness every run.</p></body></html>"))
+        self.seed.setSpecialValueText(_translate("Window", "None"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab), _translate("Window", "Single simulation"))
         self.yParameter.setToolTip(_translate("Window", "<html><head/><body><p>Which result metric that is plotted.</p></body></html>"))
         self.yParameter.setItemText(0, _translate("Window", "Key length"))
@@ -948,6 +1006,12 @@ class Ui_Window(object):
         self.label_28.setToolTip(_translate("Window", "<html><head/><body><p>End point for the desired interval of x-parameter values. Set start value and end value to the same to produce multiple simulations of the same configuration.</p></body></html>"))
         self.label_28.setText(_translate("Window", "End value x"))
         self.numberOfPoints.setToolTip(_translate("Window", "<html><head/><body><p>The number of points desired from the given interval.</p></body></html>"))
+        self.label_32.setToolTip(_translate("Window", "<html><head/><body><p>With start value equal to end value, repeat the simulation until the 95% confidence interval on the y-parameter is narrower than this, in the units of the plot. Number of points is then the maximum number of runs. 0 always runs all points.</p></body></html>"))
+        self.label_32.setText(_translate("Window", "CI target width"))
+        self.ciTargetWidth.setToolTip(_translate("Window", "<html><head/><body><p>With start value equal to end value, repeat the simulation until the 95% confidence interval on the y-parameter is narrower than this, in the units of the plot. Number of points is then the maximum number of runs. 0 always runs all points.</p></body></html>"))
+        self.label_33.setToolTip(_translate("Window", "<html><head/><body><p>Plot the closed-form expected values of the whole sweep instead of simulating every point. Reconciliation and privacy amplification are not included.</p></body></html>"))
+        self.label_33.setText(_translate("Window", "Expected values"))
+        self.expectedValues.setToolTip(_translate("Window", "<html><head/><body><p>Plot the closed-form expected values of the whole sweep instead of simulating every point. Reconciliation and privacy amplification are not included.</p></body></html>"))
         self.label_23.setText(_translate("Window", "Parameters"))
         self.label31.setToolTip(_translate("Window", "<html><head/><body><p>The number of points desired from the given interval.</p></body></html>"))
         self.label31.setText(_translate("Window", "Number of points"))
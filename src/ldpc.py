@@ -0,0 +1,162 @@
+from collections import OrderedDict
+import numpy as np
+from bits import Bits
+
+
+class LDPC:
+    # Regular codes with three checks per bit, the check degree sets the rate 1 - 3/degree
+    VARIABLE_DEGREE = 3
+    CHECK_DEGREES = (4, 5, 6, 7, 8, 9, 10, 12, 14, 16, 18, 20, 24, 30)
+
+    # Highest QBER at which every 2^16 bit frame of a 2^21 bit key converged, found by bisection
+    # per degree. The leakage at the threshold, 3/degree over h(QBER), rises from 1.20 at degree 4
+    # to 1.80 at degree 30. Shorter frames converge less often and may need a second round.
+    THRESHOLDS = {4: 0.156, 5: 0.105, 6: 0.0779, 7: 0.0605, 8: 0.0487, 9: 0.0402, 10: 0.0338,
+                  12: 0.025, 14: 0.0201, 16: 0.0167, 18: 0.0129, 20: 0.0114, 24: 0.0089, 30: 0.0063}
+    # Fraction of the threshold the estimated QBER may reach, the estimate from the cross check is noisy
+    BACKOFF = 0.9
+    SCALE = 0.8
+    SEED = 1984
+
+    # Frame lengths follow the key length, so only the most recently used codes are kept
+    CODE_CACHE_SIZE = 4
+    _codes = OrderedDict()
+
+    def __init__(self, block_size=1 << 16, iterations=50):
+        self.block_size = block_size
+        self.iterations = iterations
+        self.rounds = 0
+        self.leaked_bits = 0
+        self.rate = None
+
+    @staticmethod
+    def entropy(p):
+        if p <= 0 or p >= 1:
+            return 0.0
+        return float(-p*np.log2(p) - (1 - p)*np.log2(1 - p))
+
+    def check_degree(self, qber):
+        # Highest rate whose decoding threshold clears this QBER
+        for degree in reversed(LDPC.CHECK_DEGREES):
+            if qber <= LDPC.BACKOFF*LDPC.THRESHOLDS[degree]:
+                return degree
+        return LDPC.CHECK_DEGREES[0]
+
+    @staticmethod
+    def code(n, check_degree):
+        # Edges of a random regular parity-check matrix, ordered by check so every check owns
+        # check_degree consecutive edges. Alice and Bob build the same code from a fixed seed.
+        key = (n, check_degree)
+        if key in LDPC._codes:
+            LDPC._codes.move_to_end(key)
+        else:
+            rng = np.random.default_rng(LDPC.SEED)
+            variables = rng.permutation(np.repeat(np.arange(n), LDPC.VARIABLE_DEGREE))
+            m = len(variables)//check_degree
+
+            # Swap repeated bits within a check with random edges until every check is simple
+            for i in range(100):
+                rows = np.sort(variables.reshape(m, check_degree), axis=1)
+                repeated = np.flatnonzero((rows[:, 1:] == rows[:, :-1]).any(axis=1))
+                if len(repeated) == 0:
+                    break
+                edges = repeated*check_degree + rng.integers(check_degree, size=len(repeated))
+                others = rng.integers(len(variables), size=len(repeated))
+                for edge, other in zip(edges, others):
+                    variables[edge], variables[other] = variables[other], variables[edge]
+
+            by_variable = np.argsort(variables, kind="stable")
+            LDPC._codes[key] = (variables, by_variable, m)
+            if len(LDPC._codes) > LDPC.CODE_CACHE_SIZE:
+                LDPC._codes.popitem(last=False)
+        return LDPC._codes[key]
+
+    def decode(self, syndrome, received, qber, variables, by_variable, m, check_degree):
+        blocks, n = received.shape
+
+        # Bits past the end of the key are known zeros on both sides
+        llr = np.log((1 - qber)/qber)*(1 - 2*received.astype(np.float64))
+        llr[received == 2] = 1e3
+
+        syndrome_sign = 1 - 2*syndrome.astype(np.float64)
+        to_check = llr[:, variables]
+        decoded = received & 1
+        done = np.zeros(blocks, dtype=bool)
+
+        for i in range(self.iterations):
+            # Scaled min-sum: every edge gets the smallest magnitude among the other edges of its check
+            messages = to_check.reshape(blocks, m, check_degree)
+            signs = np.where(messages < 0, -1.0, 1.0)
+            magnitudes = np.abs(messages)
+
+            smallest = np.argmin(magnitudes, axis=2)
+            sorted_magnitudes = np.partition(magnitudes, 1, axis=2)
+            others_min = np.where(np.arange(check_degree) == smallest[:, :, None], sorted_magnitudes[:, :, 1:2], sorted_magnitudes[:, :, 0:1])
+
+            sign_product = signs.prod(axis=2, keepdims=True)*syndrome_sign[:, :, None]
+            to_variable = (LDPC.SCALE*sign_product*signs*others_min).reshape(blocks, -1)
+
+            total = llr + to_variable[:, by_variable].reshape(blocks, n, LDPC.VARIABLE_DEGREE).sum(axis=2)
+            hard = (total < 0).astype(np.uint8)
+
+            parity = np.bitwise_xor.reduce(hard[:, variables].reshape(blocks, m, check_degree), axis=2)
+            converged = (parity == syndrome).all(axis=1) & ~done
+            decoded[~done] = hard[~done]
+            done |= converged
+            if done.all():
+                break
+
+            to_check = total[:, variables] - to_variable
+
+        return decoded, done
+
+    def frame_size(self, n_bits, check_degree):
+        # Equal frames of at most block_size bits, rounded up to whole checks, so a short key is
+        # not padded to a whole block and does not pay for its syndrome
+        blocks = -(-n_bits//self.block_size)
+        return check_degree*-(-n_bits//(blocks*check_degree))
+
+    def frames(self, a_bits, b_bits, qber, check_degree):
+        # Decode a run of key bits in blocks of one code, returns Bob's bits and which blocks converged
+        n = self.frame_size(len(a_bits), check_degree)
+        variables, by_variable, m = LDPC.code(n, check_degree)
+
+        blocks = -(-len(a_bits)//n)
+        padding = blocks*n - len(a_bits)
+        a_blocks = np.concatenate([a_bits, np.zeros(padding, dtype=np.uint8)]).reshape(blocks, n)
+        received = np.concatenate([b_bits, np.full(padding, 2, dtype=np.uint8)]).reshape(blocks, n)
+
+        # Alice sends the syndrome of every block, the only bits this one-way scheme discloses
+        syndrome = np.bitwise_xor.reduce(a_blocks[:, variables].reshape(blocks, m, check_degree), axis=2)
+        self.leaked_bits += blocks*m
+
+        decoded, done = self.decode(syndrome, received, qber, variables, by_variable, m, check_degree)
+        return decoded.reshape(-1)[:len(b_bits)], np.repeat(done, n)[:len(b_bits)]
+
+    def reconcile(self, a_key, b_key, qber):
+        self.leaked_bits = 0
+        self.rounds = 0
+
+        a_bits = a_key.unpack()
+        b_bits = b_key.unpack()
+        if len(a_bits) == 0:
+            return b_key
+
+        qber = min(max(qber, 1e-4), 0.5 - 1e-4)
+        degree = LDPC.CHECK_DEGREES.index(self.check_degree(qber))
+        self.rate = 1 - LDPC.VARIABLE_DEGREE/LDPC.CHECK_DEGREES[degree]
+
+        # Blocks that fail to converge are flagged by Bob and sent again under the next lower rate code
+        corrected = b_bits.copy()
+        pending = np.arange(len(b_bits))
+        while len(pending):
+            decoded, done = self.frames(a_bits[pending], b_bits[pending], qber, LDPC.CHECK_DEGREES[degree])
+            corrected[pending] = decoded
+            self.rounds += 1
+
+            if degree == 0:
+                break
+            pending = pending[~done]
+            degree -= 1
+
+        return Bits.pack(corrected)
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+import os
+import pickle
+import tempfile
+import numpy as np
+
+CACHE_DIR = os.environ.get("QKD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "qkd-simulations"))
+
+
+class LookupTable:
+    VERSION = 2
+
+    def __init__(self, cache_size=256, cache_path=os.path.join(CACHE_DIR, "lookup.pkl")):
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self._table = OrderedDict()
+        self._disk = None
+        self._disk_changed = False
+
+    @staticmethod
+    def simulate(qc):
+        from qiskit import QuantumCircuit
+        from qiskit.quantum_info import DensityMatrix
+
+        measured = {}
+        stripped = QuantumCircuit(qc.num_qubits)
+
+        for gate in qc.data:
+            qubits = [qc.find_bit(q).index for q in gate.qubits]
+
+            if gate.operation.name == "measure":
+                measured[qc.find_bit(gate.clbits[0]).index] = qubits[0]
+            elif gate.operation.name == "barrier":
+                continue
+            elif any(q in measured.values() for q in qubits):
+                raise Exception("Lookup engine requires all measurements at the end of the circuit")
+            else:
+                stripped.append(gate.operation, qubits)
+
+        probabilities = np.clip(DensityMatrix(stripped).probabilities([measured[c] for c in range(qc.num_clbits)]), 0, None)
+        return probabilities/probabilities.sum()
+
+    @staticmethod
+    def read(path):
+        # Another process may be replacing the file, or it may be from an older version or
+        # damaged. Anything unreadable counts as an empty table.
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "rb") as f:
+                stored = pickle.load(f)
+        except Exception:
+            return {}
+        if not isinstance(stored, dict) or stored.get("version") != LookupTable.VERSION:
+            return {}
+        return stored["table"]
+
+    def load(self):
+        self._disk = LookupTable.read(self.cache_path)
+
+    def save(self):
+        if not self.cache_path or not self._disk_changed:
+            return
+
+        # Keep what other processes stored since this one loaded, then swap the file in whole
+        # so readers never see it half written
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        self._disk = {**LookupTable.read(self.cache_path), **self._disk}
+
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".lookup-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"version": LookupTable.VERSION, "table": self._disk}, f)
+            os.replace(temporary, self.cache_path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self._disk_changed = False
+
+    def distribution(self, key, qc):
+        if key in self._table:
+            self._table.move_to_end(key)
+            return self._table[key]
+
+        if self._disk is None:
+            self.load()
+
+        if key not in self._disk:
+            self._disk[key] = LookupTable.simulate(qc)
+            self._disk_changed = True
+
+        self._table[key] = self._disk[key]
+        if len(self._table) > self.cache_size:
+            self._table.popitem(last=False)
+        return self._table[key]
+
+    def run(self, tape, rng=None):
+        # One uniform per row, inverted through the distribution of its circuit, so a row's
+        # outcome does not depend on which other rows share the tape
+        u = np.random.default_rng(rng).random(len(tape))
+        first, inverse = tape.classes()
+        measured = np.zeros((len(tape), tape.n_qubits), dtype=np.uint8)
+
+        for c, i in enumerate(first):
+            rows = np.flatnonzero(inverse == c)
+            probabilities = self.distribution(tape.key(i), tape.circuit(i))
+            outcomes = np.minimum(np.searchsorted(np.cumsum(probabilities), u[rows], side="right"), len(probabilities) - 1)
+            measured[rows] = (outcomes[:, None] >> np.arange(tape.n_qubits)) & 1
+
+        self.save()
+        return measured
@@ -2,17 +2,27 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import QTimer
 from gui import Ui_Window
 from system import System
-import pandas as pd
+from sweep import Sweep, ExpectedSweep
+from adaptive import AdaptiveRuns
+from cache import ResultCache
 import numpy as np
-from matplotlib import pyplot as plt
 from threading import Thread
 
 QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_EnableHighDpiScaling, True)
 
+
+def print_results(results):
+    # pandas is only needed for the console table, so it is imported on first use
+    import pandas as pd
+    print(pd.Series(data=results))
+
+
 class Main():
     def __init__(self, ui):
         self._ui = ui
         self._system = None
+        self._system_parameters = None
+        self._sweep = None
         self._view_system = None
 
         pixmap = QtGui.QPixmap("resources/sample_plot.png")
@@ -33,10 +43,14 @@ class Main():
         self._ui.abortButtonSingle.clicked.connect(self.abortClicked)
     
     def abortClicked(self):
+        from matplotlib import pyplot as plt
+
         self.timer.stop()
 
         if self._system:
             self._system.abort = True
+            if self._sweep:
+                self._sweep.abort = True
             self.run_thread.join()
         
         plt.close()
@@ -93,6 +107,8 @@ class Main():
         self.run_simulation()
     
     def multiple_run_clicked(self):
+        from matplotlib import pyplot as plt
+
         if self.run_thread:
             if self.run_thread.is_alive():
                 return
@@ -119,8 +135,11 @@ class Main():
         generation_uncertainty_mean = self._ui.generationUncertainty.value()
         detector_efficiency = self._ui.detectorLoss.value()/100
         source_efficiency = self._ui.sourceEfficiency.value()/100
+        # The lowest value of the seed box reads None
+        seed = self._ui.seed.value()
+        seed = seed if seed >= 0 else None
 
-        self._system = System(
+        self._system_parameters = dict(
             protocol=protocol, 
             fiber_length=fiber_length, 
             fiber_loss=fiber_loss, 
@@ -128,8 +147,11 @@ class Main():
             generation_rate=generation_rate, 
             uncertainty_mean=generation_uncertainty_mean,
             detector_efficiency=detector_efficiency,
-            source_efficiency=source_efficiency
+            source_efficiency=source_efficiency,
+            seed=seed
         )
+
+        self._system = System(**self._system_parameters)
     
     def run_simulation(self):
         perturb = self._ui.perturbationsEnabled.isChecked()
@@ -139,17 +161,41 @@ class Main():
         eavesdrop = self._ui.eavesdroppingEnabled.isChecked()
         add_uncertainty = self._ui.generationUncertaintyEnabled.isChecked()
 
-        self._system.progress = 0
+        simulate_parameters = dict(
+            n_bits=num_qubits,
+            perturb=perturb,
+            cross_check_fraction=cross_check_fraction,
+            losses=losses,
+            eavesdrop=eavesdrop,
+            add_uncertainty=add_uncertainty
+        )
 
-        results = None
+        self._system.progress = 0
 
-        self.run_thread = Thread(target = self._system.simulate, args = (num_qubits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty))
+        self.run_thread = Thread(target = self.simulate_single, args = (simulate_parameters,))
         self.run_thread.start()
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.single_simulation_progress_check_callback)
         self.timer.start(100)
     
+    def simulate_single(self, simulate_parameters):
+        # A seeded run comes from the result cache when it ran before. The cache is opened in this
+        # thread, sqlite connections stay in the thread that made them.
+        cache = ResultCache() if ResultCache.cacheable(self._system_parameters) else None
+        try:
+            results = cache.get(self._system_parameters, simulate_parameters) if cache is not None else None
+            if results is None:
+                results = self._system.simulate(**simulate_parameters)
+                if cache is not None:
+                    cache.put(self._system_parameters, simulate_parameters, results)
+            else:
+                self._system.results = results
+                self._system.progress = 100
+        finally:
+            if cache is not None:
+                cache.close()
+
     def single_simulation_progress_check_callback(self):
         self._ui.progressBar.setValue(self._system.progress)
         if self._system.progress == 100:
@@ -164,27 +210,67 @@ class Main():
             self._ui.S.setText(str(round(results["S"], 2)) if results["S"] else "None")
             self._ui.lossProbability.setText(str(round(100-results["Calculated loss probability"]*100, 2)) + " %" if results["Calculated loss probability"] else "None")
 
-            self._view_system = self._system
+            # A cached run has no circuits to show
+            self._view_system = None if results.get("Cached") else self._system
 
-            print(pd.Series(data=results))
+            print_results(results)
             self.timer.stop()
     
     def simulate_multiple(self, num_qubits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty):
-        for x_param_value in self.msd.x_param_values:
-            if self.msd.x_param_name != "Cross check fraction":
-                self._system.set_parameter(self.msd.x_param_name, x_param_value)
-            else:
-                cross_check_fraction = x_param_value/100
-
-            result = self._system.simulate(
-                n_bits=num_qubits, 
-                losses=losses, 
-                perturb=perturb, 
-                cross_check_fraction=cross_check_fraction, 
-                eavesdrop=eavesdrop, 
-                add_uncertainty=add_uncertainty
+        # Seeded sweeps look their points up in the result cache, opened in this thread
+        seed = self._system_parameters["seed"]
+        cache = ResultCache() if seed is not None else None
+        try:
+            self.sweep_points(num_qubits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty, seed, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def sweep_points(self, num_qubits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty, seed, cache):
+        from matplotlib import pyplot as plt
+
+        simulate_parameters = dict(
+            n_bits=num_qubits, 
+            losses=losses, 
+            perturb=perturb, 
+            cross_check_fraction=cross_check_fraction, 
+            eavesdrop=eavesdrop, 
+            add_uncertainty=add_uncertainty
+        )
+
+        if self.msd.expected:
+            self._sweep = ExpectedSweep(
+                system_parameters=self._system_parameters,
+                simulate_parameters=simulate_parameters,
+                x_param_name=self.msd.x_param_name,
+                x_param_values=self.msd.x_param_values
+            )
+            runs = self._sweep.run()
+        elif self.msd.adaptive:
+            # Repeat until the CI is narrow enough, the number of points is the most runs allowed.
+            # The target is in plot units, QBER is plotted in percent.
+            scale = 100 if self.msd.y_param_name == "QBER" else 1
+            self._sweep = AdaptiveRuns(
+                system_parameters=self._system_parameters,
+                simulate_parameters=simulate_parameters,
+                metric=self.msd.y_param_name,
+                target_width=self.msd.ci_target_width/scale,
+                max_runs=len(self.msd.x_param_values),
+                seed=seed
             )
+            runs = ((i, self.msd.x_param_start, result) for i, result, stats in self._sweep.run())
+        else:
+            self._sweep = Sweep(
+                system_parameters=self._system_parameters,
+                simulate_parameters=simulate_parameters,
+                x_param_name=self.msd.x_param_name,
+                x_param_values=self.msd.x_param_values,
+                seed=seed,
+                cache=cache
+            )
+            runs = self._sweep.run()
 
+        for _, x_param_value, result in runs:
             if result is None:
                 print("Aborted")
                 return
@@ -198,14 +284,28 @@ class Main():
             else:
                 self.msd.y_param_values.append(result[self.msd.y_param_name])
             
-            print(pd.Series(data=result))
+            print_results(result)
+
+            # Expected values arrive all at once, plot them once
+            if self.msd.expected and len(self.msd.used_x_param_values) < len(self.msd.x_param_values):
+                continue
 
             if self.msd.x_param_start == self.msd.x_param_end:
                 plt.scatter([i+1 for i in range(len(self.msd.y_param_values))], self.msd.y_param_values, color=(0, 170/255, 127/255), s=12)
                 plt.xlabel("Simulation number")
+
+                if self.msd.adaptive:
+                    self.draw_ci_band(plt)
             else:
-                plt.plot(self.msd.used_x_param_values, self.msd.y_param_values, "--", color=(0, 170/255, 127/255))
-                plt.scatter(self.msd.used_x_param_values, self.msd.y_param_values, color=(0, 170/255, 127/255), s=12)
+                # Points finish out of order, so the line is redrawn through all of them sorted by x
+                if self.msd.line:
+                    self.msd.line.remove()
+                x_sorted, y_sorted = zip(*sorted(zip(self.msd.used_x_param_values, self.msd.y_param_values)))
+                self.msd.line, = plt.plot(x_sorted, y_sorted, "--", color=(0, 170/255, 127/255))
+                if self.msd.expected:
+                    plt.scatter(self.msd.used_x_param_values, self.msd.y_param_values, color=(0, 170/255, 127/255), s=12)
+                else:
+                    plt.scatter([x_param_value], [self.msd.y_param_values[-1]], color=(0, 170/255, 127/255), s=12)
                 plt.xlabel(self.msd.x_param_name + self.msd.x_suffix)
 
             plt.ylabel(self.msd.y_param_name + self.msd.y_suffix)
@@ -214,11 +314,39 @@ class Main():
             self.msd.pixmap = QtGui.QPixmap("resources/multi_sim_plot.png")
 
             self.msd.updated = True
+
+        if self._sweep.abort:
+            print("Aborted")
+            return
+
+        self.msd.finished = True
+        self.msd.updated = True
         
         print(self.msd.used_x_param_values)
         print(self.msd.y_param_values)
     
+    def draw_ci_band(self, plt):
+        # Running mean with its confidence band after every run, replaced on each redraw
+        stats = self._sweep.stats
+        scale = 100 if self.msd.y_param_name == "QBER" else 1
+        half_width = stats.half_width(self._sweep.confidence)*scale
+
+        self.msd.ci_means.append(stats.mean*scale)
+        self.msd.ci_half_widths.append(half_width if np.isfinite(half_width) else np.nan)
+
+        if self.msd.band:
+            self.msd.band.remove()
+            self.msd.line.remove()
+
+        runs = np.arange(1, len(self.msd.ci_means) + 1)
+        means = np.array(self.msd.ci_means)
+        half_widths = np.array(self.msd.ci_half_widths)
+        self.msd.band = plt.fill_between(runs, means - half_widths, means + half_widths, color=(0, 170/255, 127/255), alpha=0.2)
+        self.msd.line, = plt.plot(runs, means, "-", color="green")
+
     def multi_sim_progress_check_callback(self):
+        from matplotlib import pyplot as plt
+
         if not self.msd.updated:
             return
 
@@ -227,7 +355,9 @@ class Main():
 
         self._ui.multiProgressBar.setValue(round(100*len(self.msd.used_x_param_values)/len(self.msd.x_param_values), 2))
 
-        if len(self.msd.used_x_param_values) == len(self.msd.x_param_values):
+        if self.msd.finished or len(self.msd.used_x_param_values) == len(self.msd.x_param_values):
+            self._ui.multiProgressBar.setValue(100)
+
             if self.msd.x_param_start == self.msd.x_param_end:
                 plt.scatter([i+1 for i in range(len(self.msd.y_param_values))], self.msd.y_param_values, color=(0, 170/255, 127/255), s=12)
                 plt.xlabel("Simulation number")
@@ -235,8 +365,12 @@ class Main():
 
                 mean = round(np.mean(self.msd.y_param_values), 2)
                 std = round(np.std(self.msd.y_param_values), 2)
+                label = "Mean: " + str(mean) + ", std: " + str(std)
+
+                if self.msd.adaptive:
+                    label += ", 95% CI: ±" + str(round(self.msd.ci_half_widths[-1], 4)) + " after " + str(len(self.msd.y_param_values)) + " runs"
 
-                plt.axhline(y = mean, color = 'green', linestyle = '--', label="Mean: " + str(mean) + ", std: " + str(std))
+                plt.axhline(y = mean, color = 'green', linestyle = '--', label=label)
                 plt.legend()
 
                 plt.savefig("resources/multi_sim_plot.png")
@@ -256,6 +390,8 @@ class Main():
         self.msd.updated = False
     
     def run_multiple_simulations(self):
+        from matplotlib import pyplot as plt
+
         perturb = self._ui.perturbationsEnabled.isChecked()
         losses = self._ui.lossesEnabled.isChecked()
         cross_check_fraction = self._ui.crossCheckFraction.value()/100
@@ -269,6 +405,8 @@ class Main():
         x_param_start = self._ui.startValue.value()
         x_param_end = self._ui.endValue.value()
         x_param_n_points = self._ui.numberOfPoints.value()
+        ci_target_width = self._ui.ciTargetWidth.value()
+        expected = self._ui.expectedValues.isChecked()
 
         self._ui.multiProgressBar.setValue(0)
 
@@ -319,6 +457,9 @@ class Main():
             x_suffix,
             y_suffix
         )
+        self.msd.expected = expected
+        self.msd.adaptive = not expected and x_param_start == x_param_end and ci_target_width > 0
+        self.msd.ci_target_width = ci_target_width
 
         self.run_thread = Thread(target = self.simulate_multiple, args = (num_qubits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty))
         self.run_thread.start()
@@ -342,6 +483,14 @@ class MultisimData:
             self.y_suffix = y_suffix
             self.updated = False
             self.pixmap = None
+            self.line = None
+            self.finished = False
+            self.adaptive = False
+            self.expected = False
+            self.ci_target_width = 0
+            self.ci_means = []
+            self.ci_half_widths = []
+            self.band = None
 
 
 if __name__ == "__main__":
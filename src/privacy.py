@@ -0,0 +1,63 @@
+import math
+import numpy as np
+from bits import Bits
+from ldpc import LDPC
+
+
+class PrivacyAmplification:
+    # Leakage assumed when the keys were not reconciled, relative to the Shannon limit
+    RECONCILIATION_EFFICIENCY = 1.16
+
+    def __init__(self, block_size=None, security=1e-10, rng=None):
+        self.block_size = block_size
+        self.security = security
+        self._rng = np.random.default_rng(rng)
+
+    def secret_length(self, n, qber, leaked_bits=None):
+        # Asymptotic BB84 bound with the phase error taken equal to the QBER, less the
+        # reconciliation leakage and the finite-size cost of the security parameter
+        if leaked_bits is None:
+            leaked_bits = PrivacyAmplification.RECONCILIATION_EFFICIENCY*n*LDPC.entropy(qber)
+
+        length = n*(1 - LDPC.entropy(qber)) - leaked_bits - 2*math.log2(1/self.security)
+        return max(int(length), 0)
+
+    def hash(self, keys, length):
+        # Toeplitz hashing of every key with the same random length x n matrix, row i is
+        # seed[i:i + n] reversed. The product is the middle of the convolution of seed and key.
+        # By default one FFT of the whole seed and key, O((n + length) log(n + length)) time and
+        # a few float arrays of n + length. block_size caps the FFT size instead: every pair of an
+        # output block and a key block gets its own FFT, memory O(block_size) but time
+        # O(n length/block_size log block_size).
+        n = len(keys[0])
+        if n == 0 or length <= 0:
+            return [Bits.pack(np.zeros(0, dtype=np.uint8)) for key in keys]
+
+        seed = Bits.random(n + length - 1, self._rng).unpack()
+        bits = [key.unpack() for key in keys]
+
+        if self.block_size is None or self.block_size >= max(n, length):
+            return [Bits.pack(bit) for bit in PrivacyAmplification.product(seed, bits, n, length)]
+
+        block = self.block_size
+        sums = [np.zeros(length, dtype=np.uint8) for key in keys]
+        for row in range(0, length, block):
+            rows = min(row + block, length) - row
+            for column in range(0, n, block):
+                columns = min(column + block, n) - column
+                # Entries of the seed that meet key bits column onwards in the rows row onwards
+                segment = seed[row + n - column - columns:row + n - column + rows - 1]
+                products = PrivacyAmplification.product(segment, [key[column:column + columns] for key in bits], columns, rows)
+                for total, product in zip(sums, products):
+                    total[row:row + rows] ^= product
+
+        return [Bits.pack(total) for total in sums]
+
+    @staticmethod
+    def product(seed, keys, n, length):
+        # Entries n - 1 to n + length - 2 of the convolution of seed with every key, mod 2. A circular
+        # convolution of at least len(seed) = n + length - 1 entries wraps its tail into the first
+        # n - 1 entries only, which are not used.
+        size = 1 << (n + length - 2).bit_length()
+        seed_spectrum = np.fft.rfft(seed, size)
+        return [(np.rint(np.fft.irfft(np.fft.rfft(key, size)*seed_spectrum, size)[n - 1:n - 1 + length]).astype(np.int64) & 1).astype(np.uint8) for key in keys]
@@ -1,6 +1,6 @@
-import random
 import math
 import numpy as np
+from bits import Bits
 
 
 class Protocol:
@@ -19,24 +19,39 @@ class Protocol:
 
     @staticmethod
     def cross_check(system, fraction):
-        check_size = math.ceil(len(system._a_key)*fraction)
+        a_key = system._a_key
+        b_key = system._b_key
 
-        check_indexes = random.sample([i for i in range(len(system._a_key))], check_size)
+        check_size = min(math.ceil(len(a_key)*fraction), len(a_key))
 
-        a_check = [system._a_key[i] for i in check_indexes]
-        b_check = [system._b_key[i] for i in check_indexes]
+        check = np.zeros(len(a_key), dtype=bool)
+        check[system.rng("cross check").choice(len(a_key), check_size, replace=False)] = True
 
-        num_matches = len([i for i, j in zip(a_check, b_check) if i == j])
+        num_errors = (a_key[check] ^ b_key[check]).count()
 
-        system._a_key = [val for i, val in enumerate(system._a_key) if i not in check_indexes]
-        system._b_key = [val for i, val in enumerate(system._b_key) if i not in check_indexes]
+        system._a_key = a_key[~check]
+        system._b_key = b_key[~check]
+        if system._sifted is not None:
+            sifted = system._sifted.mask()
+            sifted[sifted] = ~check
+            system._sifted = Bits.pack(sifted)
 
-        return 1 - num_matches/check_size
+        return num_errors/check_size
 
     @staticmethod
     def eavesdrop(system):
         pass
 
     @staticmethod
-    def test_statistic(system):
-        return None
\ No newline at end of file
+    def statistic_counts(system):
+        return None
+
+    @staticmethod
+    def test_statistic(system, counts=None):
+        return None
+
+    @staticmethod
+    def expected_rates(cos, sin, eavesdrop):
+        # Closed-form (sifted fraction of received pulses, QBER, S), given E[cos theta] and E[sin theta]
+        # of the channel rotation theta on one arm
+        return None
@@ -0,0 +1,241 @@
+import numpy as np
+from tape import GateTape
+
+
+def streams(rng):
+    # A function from the name of a stream of draws to its generator. System passes its own rng,
+    # a seed or generator serves every stream on its own.
+    if callable(rng):
+        return rng
+    rng = np.random.default_rng(rng)
+    return lambda stream: rng
+
+
+def select(values, rows):
+    if rows is None or np.ndim(values) == 0:
+        return values
+    return np.asarray(values)[rows]
+
+
+class TapeRegister:
+    PULSE_BYTES = 512
+
+    def __init__(self, n, n_qubits, executor, rng=None):
+        self.n_qubits = n_qubits
+        self.tape = GateTape(n, n_qubits)
+        self._executor = executor
+        self._rng = streams(rng)
+
+    def __len__(self):
+        return len(self.tape)
+
+    def x(self, qubit, rows=None):
+        self.tape.append("x", (qubit,), rows)
+
+    def h(self, qubit, rows=None):
+        self.tape.append("h", (qubit,), rows)
+
+    def ry(self, theta, qubit, rows=None):
+        self.tape.append("ry", (qubit,), rows, select(theta, rows))
+
+    def cx(self, control, target, rows=None):
+        self.tape.append("cx", (control, target), rows)
+
+    def reset(self, qubit, rows=None):
+        self.tape.append("reset", (qubit,), rows)
+
+    def barrier(self):
+        self.tape.append("barrier", (0,))
+
+    def measure(self):
+        for q in range(self.n_qubits):
+            self.tape.append("measure", (q,))
+
+        measured = self._executor.run(self.tape, self._rng("measurement"))
+        return measured[:, 0] if self.n_qubits == 1 else measured
+
+
+class AnalyticRegister:
+    # Every state the protocols prepare is real: either a product of single-qubit states
+    # cos(phi)|0> + sin(phi)|1>, or a Bell pair (I x M)|Phi+> with M a real orthogonal matrix.
+    # x, h and ry are themselves orthogonal, R(a) or R(a)Z, so each row is tracked by angles
+    # alone. Measuring gives P(1) = sin(phi)^2 per arm, and P(b0 != b1) = sin(a)^2 for pairs.
+    PULSE_BYTES = 64
+
+    def __init__(self, n, n_qubits, rng=None):
+        self.n_qubits = n_qubits
+        self._rng = streams(rng)
+        self._phi = np.zeros((n, n_qubits))
+        self._entangled = np.zeros(n, dtype=bool)
+        self._angle = np.zeros(n)
+        self._reflected = np.zeros(n, dtype=bool)
+
+    def __len__(self):
+        return len(self._phi)
+
+    def _mask(self, rows):
+        mask = np.zeros(len(self), dtype=bool)
+        mask[slice(None) if rows is None else rows] = True
+        return mask
+
+    def _apply(self, angle, reflect, qubit, rows):
+        mask = self._mask(rows)
+        angle = np.broadcast_to(angle, mask.shape)
+        sign = -1 if reflect else 1
+
+        product = mask & ~self._entangled
+        self._phi[product, qubit] = angle[product] + sign*self._phi[product, qubit]
+
+        entangled = mask & self._entangled
+        if qubit == 1: # M -> G M
+            self._angle[entangled] = angle[entangled] + sign*self._angle[entangled]
+        else: # M -> M G^T
+            transposed = angle[entangled] if reflect else -angle[entangled]
+            self._angle[entangled] += np.where(self._reflected[entangled], -1, 1)*transposed
+        self._reflected[entangled] ^= reflect
+
+    def x(self, qubit, rows=None):
+        self._apply(np.pi/2, True, qubit, rows)
+
+    def h(self, qubit, rows=None):
+        self._apply(np.pi/4, True, qubit, rows)
+
+    def ry(self, theta, qubit, rows=None):
+        self._apply(np.asarray(theta)/2, False, qubit, rows)
+
+    def cx(self, control, target, rows=None):
+        mask = self._mask(rows)
+        if self._entangled[mask].any():
+            raise Exception("Analytic engine does not support cx on entangled qubits")
+
+        phi_control = self._phi[:, control]
+        phi_target = self._phi[:, target]
+        basis_control = mask & np.isclose(np.sin(2*phi_control), 0)
+        plus_control = mask & np.isclose(np.cos(2*phi_control), 0) & np.isclose(np.sin(2*phi_target), 0)
+
+        if (mask & ~basis_control & ~plus_control).any():
+            raise Exception("Analytic engine only supports cx with a basis state control or a |+>/|-> control and basis state target")
+
+        # Control in |1> flips the target, the state stays a product
+        flipped = basis_control & (np.sin(phi_control)**2 > 0.5)
+        self._phi[flipped, target] = np.pi/2 - self._phi[flipped, target]
+
+        # Control in |+>/|-> gives amplitude c_a*d_(b xor a) for control a and target b
+        c = np.stack([np.cos(phi_control[plus_control]), np.sin(phi_control[plus_control])], axis=1)
+        d = np.stack([np.cos(phi_target[plus_control]), np.sin(phi_target[plus_control])], axis=1)
+        amplitudes = np.sqrt(2)*np.stack([c[:, 0:1]*d, c[:, 1:2]*d[:, ::-1]], axis=1)
+        M = amplitudes if control == 1 else amplitudes.transpose(0, 2, 1)
+
+        self._angle[plus_control] = np.arctan2(M[:, 1, 0], M[:, 0, 0])
+        self._reflected[plus_control] = np.linalg.det(M) < 0
+        self._entangled[plus_control] = True
+        self._phi[plus_control] = 0
+
+    def reset(self, qubit, rows=None):
+        mask = self._mask(rows)
+
+        # The other half of a reset Bell pair is maximally mixed, so it is replaced by a
+        # random basis state, which gives the same measurement statistics
+        entangled = mask & self._entangled
+        if self.n_qubits == 2:
+            self._phi[entangled, 1 - qubit] = np.pi/2*(self._rng("reset {}".format(qubit)).random(entangled.sum()) < 0.5)
+        self._entangled[entangled] = False
+
+        self._phi[mask, qubit] = 0
+
+    def barrier(self):
+        pass
+
+    def measure(self):
+        # One uniform per qubit of every row, a pair uses its two for Alice's bit and the flip
+        u = self._rng("measurement").random(self._phi.shape)
+        measured = (u < np.sin(self._phi)**2).astype(np.uint8)
+
+        if self._entangled.any():
+            a_bits = u[self._entangled, 0] < 0.5
+            flipped = u[self._entangled, 1] < np.sin(self._angle[self._entangled])**2
+            measured[self._entangled, 0] = a_bits
+            measured[self._entangled, 1] = a_bits ^ flipped
+
+        return measured[:, 0] if self.n_qubits == 1 else measured
+
+
+class StatevectorRegister:
+    PULSE_BYTES = 256
+
+    X = np.array([[0, 1], [1, 0]], dtype=complex)
+    H = np.array([[1, 1], [1, -1]], dtype=complex)/np.sqrt(2)
+    CX = np.array([[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0], [0, 1, 0, 0]], dtype=complex)
+
+    def __init__(self, n, n_qubits, rng=None):
+        self.n_qubits = n_qubits
+        self._rng = streams(rng)
+        self._state = np.zeros((n, 2**n_qubits), dtype=complex)
+        self._state[:, 0] = 1
+
+    def __len__(self):
+        return len(self._state)
+
+    def apply(self, matrix, qubits, rows=None):
+        # matrix is a single gate or one gate per row, with qubits[0] as its least significant bit
+        rows = slice(None) if rows is None else rows
+        matrix = np.asarray(matrix, dtype=complex)
+        k = len(qubits)
+
+        # Amplitude axes run from the highest qubit to qubit 0
+        axes = [self.n_qubits - q for q in reversed(qubits)]
+        psi = np.moveaxis(self._state[rows].reshape((-1,) + (2,)*self.n_qubits), axes, range(-k, 0))
+        shape = psi.shape
+        psi = psi.reshape(shape[0], int(np.prod(shape[1:-k])), 2**k)
+
+        if matrix.ndim == 2:
+            psi = np.einsum('ij,nrj->nri', matrix, psi)
+        else:
+            psi = np.einsum('nij,nrj->nri', matrix[rows], psi)
+
+        psi = np.moveaxis(psi.reshape(shape), range(-k, 0), axes)
+        self._state[rows] = psi.reshape(-1, 2**self.n_qubits)
+
+    def x(self, qubit, rows=None):
+        self.apply(StatevectorRegister.X, [qubit], rows)
+
+    def h(self, qubit, rows=None):
+        self.apply(StatevectorRegister.H, [qubit], rows)
+
+    def ry(self, theta, qubit, rows=None):
+        theta = np.asarray(theta)
+        c = np.cos(theta/2)
+        s = np.sin(theta/2)
+        self.apply(np.stack([np.stack([c, -s], -1), np.stack([s, c], -1)], -2), [qubit], rows)
+
+    def cx(self, control, target, rows=None):
+        self.apply(StatevectorRegister.CX, [control, target], rows)
+
+    def _sample_qubit(self, qubit, rows):
+        ones = (np.arange(2**self.n_qubits) >> qubit) & 1 == 1
+        p1 = (np.abs(self._state[rows][:, ones])**2).sum(axis=1)
+        return ones, self._rng("reset {}".format(qubit)).random(len(p1)) < p1
+
+    def reset(self, qubit, rows=None):
+        # Measure the qubit, collapse the row onto the outcome and flip it back to |0>
+        rows = np.arange(len(self))[slice(None) if rows is None else rows]
+        ones, outcomes = self._sample_qubit(qubit, rows)
+
+        state = self._state[rows]
+        state[np.ix_(outcomes, ~ones)] = 0
+        state[np.ix_(~outcomes, ones)] = 0
+        state /= np.linalg.norm(state, axis=1, keepdims=True)
+        self._state[rows] = state
+
+        self.x(qubit, rows[outcomes])
+
+    def barrier(self):
+        pass
+
+    def measure(self):
+        cumulative = np.cumsum(np.abs(self._state)**2, axis=1)
+        u = self._rng("measurement").random(len(self))*cumulative[:, -1]
+        outcomes = np.minimum((cumulative < u[:, None]).sum(axis=1), 2**self.n_qubits - 1)
+
+        measured = ((outcomes[:, None] >> np.arange(self.n_qubits)) & 1).astype(np.uint8)
+        return measured[:, 0] if self.n_qubits == 1 else measured
@@ -0,0 +1,92 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+import numpy as np
+from system import System
+
+
+def run_point(system_parameters, simulate_parameters, x_param_name, x_param_value, seed):
+    # Each point gets its own seed, so it can be replayed alone with System(..., seed=seed)
+    system = System(**dict(system_parameters, seed=seed))
+    simulate_parameters = dict(simulate_parameters)
+
+    if x_param_name == "Cross check fraction":
+        simulate_parameters["cross_check_fraction"] = x_param_value/100
+    elif x_param_name is not None:
+        system.set_parameter(x_param_name, x_param_value)
+
+    return system.simulate(**simulate_parameters)
+
+
+class Sweep:
+    def __init__(self, system_parameters, simulate_parameters, x_param_name, x_param_values, max_workers=None, seed=None, cache=None):
+        self.system_parameters = system_parameters
+        self.simulate_parameters = simulate_parameters
+        self.x_param_name = x_param_name
+        self.x_param_values = list(x_param_values)
+        self.max_workers = max_workers
+        self.seed = seed
+        self.cache = cache
+        self.abort = False
+
+    def run(self):
+        seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(self.seed).spawn(len(self.x_param_values))]
+
+        # Point seeds derived from an unseeded sweep are random, they are never looked up or stored.
+        # Points already in the result cache come back first, without a worker.
+        cache = self.cache if self.seed is not None else None
+        points = []
+        for i, (x_param_value, seed) in enumerate(zip(self.x_param_values, seeds)):
+            system_parameters = dict(self.system_parameters, seed=seed)
+            cached = cache.get(system_parameters, self.simulate_parameters, self.x_param_name, x_param_value) if cache is not None else None
+            if cached is None:
+                points.append((i, x_param_value, seed))
+            else:
+                yield i, x_param_value, cached
+
+        # The GUI starts sweeps from a thread, and forking a threaded Qt process can hang the workers
+        executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = {
+                executor.submit(run_point, self.system_parameters, self.simulate_parameters, self.x_param_name, x_param_value, seed): (i, x_param_value, seed)
+                for i, x_param_value, seed in points
+            }
+            pending = set(futures)
+
+            # Points are yielded as (index, x value, results) in the order they finish
+            while pending and not self.abort:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, x_param_value, seed = futures[future]
+                    result = future.result()
+                    if cache is not None:
+                        cache.put(dict(self.system_parameters, seed=seed), self.simulate_parameters, result, self.x_param_name, x_param_value)
+                    yield i, x_param_value, result
+        finally:
+            executor.shutdown(wait=not self.abort, cancel_futures=True)
+
+
+class ExpectedSweep:
+    # Closed-form expected values for every point of a sweep in one vectorized call, the swept
+    # parameter is set to the array of sweep values. Same interface as Sweep.
+    def __init__(self, system_parameters, simulate_parameters, x_param_name, x_param_values):
+        self.system_parameters = system_parameters
+        self.simulate_parameters = simulate_parameters
+        self.x_param_name = x_param_name
+        self.x_param_values = list(x_param_values)
+        self.abort = False
+
+    def run(self):
+        system = System(**self.system_parameters)
+        simulate_parameters = dict(self.simulate_parameters)
+        x_param_values = np.asarray(self.x_param_values, dtype=float)
+
+        if self.x_param_name == "Cross check fraction":
+            simulate_parameters["cross_check_fraction"] = x_param_values/100
+        elif self.x_param_name is not None:
+            system.set_parameter(self.x_param_name, x_param_values)
+
+        results = system.expected(**simulate_parameters)
+
+        # Swept results are arrays over the points, the rest are shared
+        for i, x_param_value in enumerate(self.x_param_values):
+            yield i, x_param_value, {key: value[i] if np.ndim(value) else value for key, value in results.items()}
@@ -1,15 +1,32 @@
-from tools import Tools
 import numpy as np
 import tqdm
-import time
 from bb84 import BB84
 from b92 import B92
 from e91 import E91
 from bbm92 import BBM92
+from executor import Executor
+from lookup import LookupTable
+from bits import Bits
+from cascade import Cascade
+from ldpc import LDPC
+from privacy import PrivacyAmplification
+from timings import StageTimer
+from registers import TapeRegister, AnalyticRegister, StatevectorRegister
 import math
+import time
+import zlib
 
 class System:
-    def __init__(self, protocol, fiber_length, fiber_loss, perturb_probability, generation_rate, uncertainty_mean, detector_efficiency, source_efficiency):
+    # Bump when a change alters simulation results, it invalidates cached results
+    VERSION = 5
+
+    # Rough bytes per pulse held outside the register: bases, message, channel angles and keys
+    PULSE_BYTES = 160
+
+    # Pulses per block of loss masks
+    LOSS_BLOCK = 1 << 20
+
+    def __init__(self, protocol, fiber_length, fiber_loss, perturb_probability, generation_rate, uncertainty_mean, detector_efficiency, source_efficiency, engine="aer", batch_size=1024, memory_budget=None, seed=None):
         if protocol == "BB84":
             self._protocol = BB84
         elif protocol == "B92":
@@ -29,7 +46,41 @@ class System:
         self._detector_efficiency = detector_efficiency
         self._source_efficiency = source_efficiency
 
-        self._loss_probability = 1 - (10 ** (-self._fiber_loss*self._fiber_length / 10))*self._detector_efficiency*self._source_efficiency
+        self._loss_probability = self.loss_probability()
+
+        if engine == "aer":
+            self._executor = Executor(batch_size)
+        elif engine == "lookup":
+            self._executor = LookupTable()
+        elif engine in ("analytic", "statevector"):
+            self._executor = None
+        else:
+            raise Exception("Invalid engine")
+        self._engine = engine
+        self._memory_budget = memory_budget
+
+        # seed is an int, a SeedSequence or a Generator, see seed_sequence and rng
+        self._seed = seed
+        self.reset()
+
+        self.__barrier_count = 0
+        self.abort = False
+    
+    def seed_sequence(self):
+        # An int or SeedSequence seed gives every run the same sequence, so a reused system repeats
+        # its runs and the reported seed replays any of them. Without a seed every run gets fresh
+        # entropy, which is reported instead. A Generator hands out a new child per run.
+        if isinstance(self._seed, np.random.Generator):
+            return self._seed.bit_generator.seed_seq.spawn(1)[0]
+        if isinstance(self._seed, np.random.SeedSequence):
+            return np.random.SeedSequence(self._seed.entropy, spawn_key=self._seed.spawn_key)
+        return np.random.SeedSequence(self._seed)
+
+    def reset(self):
+        # Start a run from the seed and forget the pulses, keys and measurements of the last run,
+        # a reused system must not report them for a run where nothing got through
+        self._sequence = self.seed_sequence()
+        self._streams = {}
 
         self._n_bits = None
         self._message = None
@@ -39,70 +90,98 @@ class System:
         self._b_bases = None
         self._a_key = None
         self._b_key = None
+        self._sifted = None
+        self._a_secret = None
+        self._b_secret = None
+
+    def rng(self, stream):
+        # Every kind of draw, e.g. the message or Bob's bases, has its own generator keyed by name
+        # and draws it in order across the chunks. Pulses draw the same values whatever the chunk
+        # size, so a chunked run gives exactly the results of a monolithic one.
+        if stream not in self._streams:
+            sequence = np.random.SeedSequence(self._sequence.entropy, spawn_key=self._sequence.spawn_key + (zlib.crc32(stream.encode()),))
+            self._streams[stream] = np.random.default_rng(sequence)
+        return self._streams[stream]
+
+    def transmittances(self):
+        # Probability that a pulse gets out of the source, and that one arm gets through the fiber
+        # and the detector. Entangled pairs come from a source midway, so each arm crosses half the fiber.
+        n_arms = 2 if self._protocol.ENTANGLEMENT else 1
+        fiber = 10 ** (-self._fiber_loss*self._fiber_length / (10*n_arms))
+        return self._source_efficiency, fiber, self._detector_efficiency
+
+    def loss_probability(self):
+        n_arms = 2 if self._protocol.ENTANGLEMENT else 1
+        source, fiber, detector = self.transmittances()
+        return 1 - source*(fiber*detector)**n_arms
+
+    def transmit(self, n_bits):
+        # Draws a Bernoulli loss mask over the pulses at the source, then in the fiber and at the
+        # detector of each arm, a pair is lost with either arm. Each mask covers only the pulses
+        # still alive and lost pulses are never built. Returns the number received and the number
+        # lost at each stage.
+        n_arms = 2 if self._protocol.ENTANGLEMENT else 1
+        source, fiber, detector = self.transmittances()
+        rng = self.rng("loss")
+
+        received = 0
+        lost = {"source": 0, "fiber": 0, "detector": 0}
+
+        for start in range(0, n_bits, System.LOSS_BLOCK):
+            emitted = min(System.LOSS_BLOCK, n_bits - start)
+            alive = np.count_nonzero(rng.random(emitted) < source)
+            lost["source"] += emitted - alive
+
+            for stage, transmittance in (("fiber", fiber), ("detector", detector)):
+                passed = np.ones(alive, dtype=bool)
+                for arm in range(n_arms):
+                    passed &= rng.random(alive) < transmittance
+                lost[stage] += alive - np.count_nonzero(passed)
+                alive = np.count_nonzero(passed)
+
+            received += alive
+
+        return received, lost
 
-        self.__barrier_count = 0
-        self.abort = False
-    
     def encode(self):
+        self.__barrier_count = 0
         self._protocol.encode_message(self)
     
+    def register_type(self):
+        if self._engine == "analytic":
+            return AnalyticRegister
+        if self._engine == "statevector":
+            return StatevectorRegister
+        return TapeRegister
+
+    def allocate_qubits(self, n_qubits):
+        if self.register_type() is TapeRegister:
+            return TapeRegister(self._n_bits, n_qubits, self._executor, self.rng)
+        return self.register_type()(self._n_bits, n_qubits, self.rng)
+
     def mess_with(self):
-        for qc in self._qubits:
-            if self._protocol.ENTANGLEMENT:
-                if self._perturb_probability == 0 and self._uncertainty_std != 0:
-                    random_angle = np.random.normal(0, self._uncertainty_std)
-                    qc.ry(random_angle, 0)
-
-                    random_angle = np.random.normal(0, self._uncertainty_std)
-                    qc.ry(random_angle, 1)
-
-                elif self._perturb_probability != 0 and self._uncertainty_std == 0:
-                    if np.random.uniform() < self._perturb_probability:
-                        random_angle = np.random.uniform(0, np.pi)
-                        qc.ry(random_angle, 0)
-
-                    if np.random.uniform() < self._perturb_probability:
-                        random_angle = np.random.uniform(0, np.pi)
-                        qc.ry(random_angle, 1)
-                
-                elif self._perturb_probability != 0 and self._uncertainty_std != 0:
-                    if np.random.uniform() < self._perturb_probability:
-                        random_angle = np.random.uniform(0, np.pi)
-                        qc.ry(random_angle, 0)
-                    else:
-                        random_angle = np.random.normal(0, self._uncertainty_std)
-                        qc.ry(random_angle, 0)
-
-                    if np.random.uniform() < self._perturb_probability:
-                        random_angle = np.random.uniform(0, np.pi)
-                        qc.ry(random_angle, 1)
-                    else:
-                        random_angle = np.random.normal(0, self._uncertainty_std)
-                        qc.ry(random_angle, 1)
-            else:
-                if self._perturb_probability == 0 and self._uncertainty_std != 0:
-                    random_angle = np.random.normal(0, self._uncertainty_std)
-                    qc.ry(random_angle, 0)
-
-                elif self._perturb_probability != 0 and self._uncertainty_std == 0:
-                    if np.random.uniform() < self._perturb_probability:
-                        random_angle = np.random.uniform(0, np.pi)
-                        qc.ry(random_angle, 0)
-                
-                elif self._perturb_probability != 0 and self._uncertainty_std != 0:
-                    if np.random.uniform() < self._perturb_probability:
-                        random_angle = np.random.uniform(0, np.pi)
-                        qc.ry(random_angle, 0)
-                    else:
-                        random_angle = np.random.normal(0, self._uncertainty_std)
-                        qc.ry(random_angle, 0)
+        # Every angle and perturbation event of the chunk, for both arms of a pair, in one draw each.
+        # A perturbation rotates uniformly on [0, pi), every other pulse gets the normal SOP drift.
+        n_arms = 2 if self._protocol.ENTANGLEMENT else 1
+        shape = (self._n_bits, n_arms)
+
+        perturbed = self.rng("perturbation").random(shape) < self._perturb_probability
+        if self._uncertainty_std != 0:
+            angles = self.rng("drift").normal(0, self._uncertainty_std, shape)
+            rotated = np.ones(shape, dtype=bool)
+        else:
+            angles = np.zeros(shape)
+            rotated = perturbed
+        angles[perturbed] = self.rng("perturbation angle").uniform(0, np.pi, np.count_nonzero(perturbed))
+
+        for arm in range(n_arms):
+            self._qubits.ry(angles[:, arm], arm, rotated[:, arm])
 
     def measure(self):
         self._protocol.measure_qubits(self)
 
     def add_barrier(self):
-        for qc in self._qubits:
-            qc.barrier()
+        self._qubits.barrier()
         self.__barrier_count += 1
 
     def eavesdrop(self):
@@ -118,126 +197,240 @@ class System:
 
 
     def show_sample(self):
+        from tools import Tools
+
+        if not isinstance(self._qubits, TapeRegister):
+            raise Exception("Sample view requires a circuit engine")
+
         if self._protocol.ENTANGLEMENT:
-            sample = np.random.choice(self._qubits, 5)
+            sample = self.rng("sample").choice(len(self._qubits), 5)
         else:
-            sample = np.random.choice(self._qubits, 10)
+            sample = self.rng("sample").choice(len(self._qubits), 10)
         
-        sample_filtered = [qc for qc in sample if qc is not None]
+        sample_circuits = [self._qubits.tape.circuit(i) for i in sample]
         
-        Tools.draw_sample(sample_filtered, self.__barrier_count, self._protocol.ENTANGLEMENT)
+        Tools.draw_sample(sample_circuits, self.__barrier_count, self._protocol.ENTANGLEMENT)
 
 
-    def simulate(self, n_bits, perturb=False, cross_check_fraction=None, losses=False, eavesdrop=False, add_uncertainty=False):
-        self._n_bits = n_bits
+    def chunk_size(self, n_bits):
+        if self._memory_budget is None:
+            return max(n_bits, 1)
 
-        total_steps = 8
+        # Whole multiples of 64 pulses, so the random bits of every chunk start on a fresh 32-bit draw
+        # and its packed bytes line up with the monolithic run's
+        pulse_bytes = System.PULSE_BYTES + self.register_type().PULSE_BYTES
+        return max(self._memory_budget // pulse_bytes // 64, 1)*64
 
-        progress_values = np.linspace(0, 100, total_steps + 1)
-        currentPbarIndex = 0
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
-        
-        if self.abort:
-            return None
+    def stream(self, n_bits, chunk_size, perturb, eavesdrop, add_uncertainty):
+        # Every stream of draws continues where the last chunk left it, see rng. The aer engine seeds
+        # its simulator per chunk, so only its chunked runs differ from monolithic ones, in distribution.
+        for start in range(0, n_bits, chunk_size):
+            self._n_bits = min(chunk_size, n_bits - start)
 
-        progress_bar = tqdm.tqdm(total=total_steps, desc="Simulating")
+            self.encode()
+            self.add_barrier()
+            yield "encode"
 
-        actual_n_bits = self._n_bits
+            if perturb or add_uncertainty:
+                self.mess_with()
+                self.add_barrier()
+            yield "channel"
 
-        if losses:
-            self._n_bits = math.ceil(self._n_bits*(1-self._loss_probability))
-        
-        progress_bar.update(1)
+            if eavesdrop:
+                self.eavesdrop()
+                self.add_barrier()
+            yield "eavesdrop"
 
-        self.encode()
-        self.add_barrier()
-        progress_bar.update(1)
+            self.measure()
+            yield "measure"
+
+            self.find_keys()
+            yield "sift"
+
+    def reconcile(self, method, qber):
+        if method == "cascade":
+            reconciler = Cascade(rng=self.rng("reconciliation"))
+        elif method == "ldpc":
+            reconciler = LDPC()
+        else:
+            raise Exception("Unknown reconciliation method: {}".format(method))
+
+        self._b_key = reconciler.reconcile(self._a_key, self._b_key, qber)
+        return reconciler
+
+    def simulate(self, n_bits, perturb=False, cross_check_fraction=None, losses=False, eavesdrop=False, add_uncertainty=False, reconciliation=None, privacy_amplification=False, trace_memory=False, profile_path=None):
+        # trace_memory adds tracemalloc peaks to the stage timings, profile_path dumps cProfile
+        # stats of the whole run (viewable with snakeviz or flameprof)
+        profiler = None
+        if profile_path:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        timer = StageTimer(n_bits, trace_memory)
+        try:
+            return self._simulate(timer, n_bits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty, reconciliation, privacy_amplification)
+        finally:
+            timer.close()
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile_path)
+
+    def _simulate(self, timer, n_bits, perturb, cross_check_fraction, losses, eavesdrop, add_uncertainty, reconciliation, privacy_amplification):
+        if self._engine == "lookup" and (perturb or add_uncertainty):
+            raise Exception("Lookup engine requires discrete circuits, disable perturbations and uncertainty")
+
+        self.reset()
+        self._n_bits = n_bits
+
+        self.progress = 0
 
         if self.abort:
             return None
 
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
-        
+        actual_n_bits = self._n_bits
+
+        # Zero or a handful of pulses may get through at high loss, then the stream has no chunks and
+        # the keys, QBER and S come out empty or None
+        lost = {"source": None, "fiber": None, "detector": None}
+        if losses:
+            timer.start()
+            self._n_bits, lost = self.transmit(self._n_bits)
+            timer.stop("loss", actual_n_bits)
+
         if not perturb:
             self._perturb_probability = 0
-        
+
         if not add_uncertainty:
             self._uncertainty_std = 0
 
-        if perturb or add_uncertainty: 
-            self.mess_with()
-            self.add_barrier()
+        sent_n_bits = self._n_bits
+        chunk_size = self.chunk_size(sent_n_bits)
+        timer.n_bits = sent_n_bits
 
+        # Losses, five stages per chunk, the estimation, reconciliation and privacy amplification
+        total_steps = 5*math.ceil(sent_n_bits/chunk_size) + 2 + bool(reconciliation) + bool(privacy_amplification)
+        step = 1
+
+        progress_bar = tqdm.tqdm(total=total_steps, desc="Simulating")
         progress_bar.update(1)
-        progress_bar.update(1)
+        timer.start()
 
-        if self.abort:
-            return None
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 2
+        a_key = []
+        b_key = []
+        sifted = []
+        counts = None
 
-        if eavesdrop:
-            self.eavesdrop()
-            self.add_barrier()
-        progress_bar.update(1)
+        for stage in self.stream(sent_n_bits, chunk_size, perturb, eavesdrop, add_uncertainty):
+            timer.stop(stage, self._n_bits)
 
-        if self.abort:
-            return None
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
+            if stage == "sift":
+                a_key.append(self._a_key)
+                b_key.append(self._b_key)
+                sifted.append(self._sifted)
 
-        if self.abort:
-            return None
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
+                chunk_counts = self._protocol.statistic_counts(self)
+                if chunk_counts is not None:
+                    counts = chunk_counts if counts is None else counts + chunk_counts
+                timer.stop("estimation", self._n_bits)
 
-        self.measure()
-        progress_bar.update(1)
+            progress_bar.update(1)
 
-        if self.abort:
-            return None
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
+            if self.abort:
+                return None
 
-        self.find_keys()
-        progress_bar.update(1)
+            self.progress = 100*step/total_steps
+            step += 1
 
-        if self.abort:
-            return None
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
+        timer.start()
+        self._n_bits = sent_n_bits
+        self._a_key = Bits.concatenate(a_key)
+        self._b_key = Bits.concatenate(b_key)
+        # Packed mask over the received pulses, set where the pulse's bit is in the key. It follows the
+        # key through the cross check and costs one bit per pulse instead of an index per key bit.
+        self._sifted = Bits.concatenate(sifted)
 
-        S = self._protocol.test_statistic(self)
+        S = self._protocol.test_statistic(self, counts)
         QBER = None
 
         if cross_check_fraction and len(self._a_key) > 0:
             QBER = self.cross_check(cross_check_fraction)
-        
+
+        timer.stop("estimation", 0)
         progress_bar.update(1)
 
         if self.abort:
             return None
-        
-        self.progress = progress_values[currentPbarIndex]
-        currentPbarIndex += 1
+
+        leaked_bits = None
+        reconciliation_rounds = None
+        residual_errors = None
+        efficiency = None
+        throughput = None
+
+        # Reconciliation sizes its blocks from the QBER, so it needs the cross check
+        if reconciliation and QBER is not None:
+            self.progress = 100*step/total_steps
+            step += 1
+
+            timer.start()
+            start = time.perf_counter()
+            reconciler = self.reconcile(reconciliation, QBER)
+            elapsed = time.perf_counter() - start
+
+            leaked_bits = reconciler.leaked_bits
+            reconciliation_rounds = reconciler.rounds
+            residual_errors = (self._a_key ^ self._b_key).count()
+            throughput = len(self._a_key)/elapsed if elapsed > 0 else None
+
+            # Leakage over the Shannon limit n h(QBER), 1 is perfect
+            if len(self._a_key) and 0 < QBER < 1:
+                efficiency = leaked_bits/(len(self._a_key)*LDPC.entropy(QBER))
+
+            timer.stop("reconciliation", len(self._a_key), "Key bits")
+            progress_bar.update(1)
+
+            if self.abort:
+                return None
+
+        final_key_length = None
+        hashing_throughput = None
+
+        # The secret length depends on the QBER as well
+        if privacy_amplification and QBER is not None:
+            self.progress = 100*step/total_steps
+            step += 1
+
+            timer.start()
+            amplifier = PrivacyAmplification(rng=self.rng("privacy amplification"))
+            final_key_length = amplifier.secret_length(len(self._a_key), QBER, leaked_bits)
+
+            start = time.perf_counter()
+            self._a_secret, self._b_secret = amplifier.hash([self._a_key, self._b_key], final_key_length)
+            elapsed = time.perf_counter() - start
+            hashing_throughput = len(self._a_key)/elapsed if elapsed > 0 else None
+
+            timer.stop("privacy amplification", len(self._a_key), "Key bits")
+            progress_bar.update(1)
+
+            if self.abort:
+                return None
+
+        self.progress = 100
 
         progress_bar.close()
         print("Simulation complete!")
 
         self.results = {
             "Protocol": self._protocol.NAME,
+            "Seed": self._sequence.entropy if not self._sequence.spawn_key else None,
             "Fiber length (km)": self._fiber_length,
             "Fiber loss (db/km)": self._fiber_loss,
             "Losses enabled": losses,
             "Calculated loss probability": self._loss_probability,
+            "Lost at source": lost["source"],
+            "Lost in fiber": lost["fiber"],
+            "Lost at detectors": lost["detector"],
             "Qubit generation rate (Hz)": self._generation_rate,
             "Generation uncertainty std (rad)": self._uncertainty_std,
             "Uncertainty enabled": add_uncertainty,
@@ -248,27 +441,90 @@ class System:
             "Key rate": self._generation_rate * len(self._a_key) / actual_n_bits,
             "Cross check fraction": cross_check_fraction,
             "QBER": QBER,
-            "S": S
+            "S": S,
+            "Reconciliation": reconciliation,
+            "Leaked bits": leaked_bits,
+            "Reconciliation rounds": reconciliation_rounds,
+            "Residual errors": residual_errors,
+            "Reconciliation efficiency": efficiency,
+            "Reconciliation throughput (bits/s)": throughput,
+            "Final key length": final_key_length,
+            "Privacy amplification throughput (bits/s)": hashing_throughput,
+            "Timings": timer.results()
         }
 
         return self.results
-    
+
+    def expected(self, n_bits, perturb=False, cross_check_fraction=None, losses=False, eavesdrop=False, add_uncertainty=False, **ignored):
+        # Closed-form expectations of simulate's key length, key rate, QBER and S, no sampling. Every
+        # formula broadcasts, so parameters set to arrays with set_parameter give a whole sweep at
+        # once. Reconciliation, privacy amplification and the profiling options are ignored.
+        perturb_probability = self._perturb_probability if perturb else 0
+        uncertainty_std = self._uncertainty_std if add_uncertainty else 0
+
+        # Moments of the rotation on one arm, uniform on [0, pi) with the perturb probability and
+        # normal otherwise
+        cos = (1 - perturb_probability)*np.exp(-np.square(uncertainty_std)/2)
+        sin = perturb_probability*2/np.pi
+
+        lost = {"source": None, "fiber": None, "detector": None}
+        sent_n_bits = n_bits
+        if losses:
+            n_arms = 2 if self._protocol.ENTANGLEMENT else 1
+            source, fiber, detector = self.transmittances()
+            lost["source"] = n_bits*(1 - source)
+            lost["fiber"] = n_bits*source*(1 - fiber**n_arms)
+            lost["detector"] = n_bits*source*fiber**n_arms*(1 - detector**n_arms)
+            sent_n_bits = n_bits*(1 - self._loss_probability)
+        sifted_fraction, QBER, S = self._protocol.expected_rates(cos, sin, eavesdrop)
+
+        # As in simulate, a fraction of None or 0 checks no bits and estimates no QBER
+        fraction = np.asarray(cross_check_fraction if cross_check_fraction is not None else 0)
+        key_length = sent_n_bits*sifted_fraction*(1 - fraction)
+        if np.ndim(fraction) > 0:
+            QBER = np.where(fraction != 0, QBER, None)
+        elif not fraction:
+            QBER = None
+
+        return {
+            "Protocol": self._protocol.NAME,
+            "Seed": None,
+            "Fiber length (km)": self._fiber_length,
+            "Fiber loss (db/km)": self._fiber_loss,
+            "Losses enabled": losses,
+            "Calculated loss probability": self._loss_probability,
+            "Lost at source": lost["source"],
+            "Lost in fiber": lost["fiber"],
+            "Lost at detectors": lost["detector"],
+            "Qubit generation rate (Hz)": self._generation_rate,
+            "Generation uncertainty std (rad)": uncertainty_std,
+            "Uncertainty enabled": add_uncertainty,
+            "Perturbations enabled": perturb,
+            "Pertrubation probability": perturb_probability,
+            "Number of bits sent": sent_n_bits,
+            "Key length": key_length,
+            "Key rate": self._generation_rate*key_length/n_bits,
+            "Cross check fraction": cross_check_fraction,
+            "QBER": QBER,
+            "S": S
+        }
+
     def set_parameter(self, param_name, param_value):
         if param_name == "Fiber length":
             self._fiber_length = param_value
-            self._loss_probability = 1 - (10 ** (-self._fiber_loss*self._fiber_length / 10))*self._detector_efficiency*self._source_efficiency
+            self._loss_probability = self.loss_probability()
         elif param_name == "Fiber loss":
             self._fiber_loss = param_value
-            self._loss_probability = 1 - (10 ** (-self._fiber_loss*self._fiber_length / 10))*self._detector_efficiency*self._source_efficiency
+            self._loss_probability = self.loss_probability()
         elif param_name == "Perturb probability":
             self._perturb_probability = param_value/100
         elif param_name == "SOP mean deviation":
             self._uncertainty_std = param_value*np.sqrt(np.pi/2)
         elif param_name == "Source generation rate":
-            self._generation_rate = param_value
+            self._generation_rate = param_value*1e6
         elif param_name == "Detector efficiency":
             self._detector_efficiency = param_value/100
-            self._loss_probability = 1 - (10 ** (-self._fiber_loss*self._fiber_length / 10))*self._detector_efficiency*self._source_efficiency
+            self._loss_probability = self.loss_probability()
         elif param_name == "Source efficiency":
             self._source_efficiency = param_value/100
-            self._loss_probability = 1 - (10 ** (-self._fiber_loss*self._fiber_length / 10))*self._detector_efficiency*self._source_efficiency
\ No newline at end of file
+            self._loss_probability = self.loss_probability()
\ No newline at end of file
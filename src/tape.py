@@ -0,0 +1,65 @@
+import numpy as np
+
+# Opcode 0 marks an unused slot, so rows with the same gates compare equal byte for byte
+OPCODES = (None, "barrier", "x", "h", "ry", "cx", "reset", "measure")
+GATE = np.dtype([("op", np.uint8), ("q0", np.uint8), ("q1", np.uint8), ("angle", np.float64)])
+
+
+class Gate:
+    __slots__ = ("name", "qubits", "angle")
+
+    def __init__(self, record):
+        self.name = OPCODES[record["op"]]
+        self.qubits = (int(record["q0"]), int(record["q1"])) if self.name == "cx" else (int(record["q0"]),)
+        self.angle = float(record["angle"])
+
+
+class GateTape:
+    def __init__(self, n, n_qubits, capacity=8):
+        self.n_qubits = n_qubits
+        self.gates = np.zeros((n, capacity), dtype=GATE)
+        self.length = np.zeros(n, dtype=np.uint16)
+
+    def __len__(self):
+        return len(self.gates)
+
+    def append(self, name, qubits, rows=None, angles=0):
+        indexes = np.arange(len(self))[slice(None) if rows is None else rows]
+        columns = self.length[indexes]
+
+        if len(indexes) > 0 and columns.max() >= self.gates.shape[1]:
+            grown = np.zeros((len(self), max(2*self.gates.shape[1], int(columns.max()) + 1)), dtype=GATE)
+            grown[:, :self.gates.shape[1]] = self.gates
+            self.gates = grown
+
+        self.gates["op"][indexes, columns] = OPCODES.index(name)
+        self.gates["q0"][indexes, columns] = qubits[0]
+        self.gates["q1"][indexes, columns] = qubits[-1]
+        self.gates["angle"][indexes, columns] = angles
+        self.length[indexes] += 1
+
+    def row(self, i):
+        return [Gate(record) for record in self.gates[i, :self.length[i]]]
+
+    def key(self, i):
+        return self.n_qubits.to_bytes(1, "little") + self.gates[i, :self.length[i]].tobytes()
+
+    def circuit(self, i):
+        from qiskit import QuantumCircuit
+
+        qc = QuantumCircuit(self.n_qubits, self.n_qubits)
+        for gate in self.row(i):
+            if gate.name == "barrier":
+                qc.barrier()
+            elif gate.name == "ry":
+                qc.ry(gate.angle, gate.qubits[0])
+            elif gate.name == "measure":
+                qc.measure(gate.qubits[0], gate.qubits[0])
+            else:
+                getattr(qc, gate.name)(*gate.qubits)
+        return qc
+
+    def classes(self):
+        rows = np.ascontiguousarray(self.gates).view(np.dtype((np.void, self.gates.dtype.itemsize*self.gates.shape[1]))).ravel()
+        _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        return first, inverse.ravel()
@@ -0,0 +1,58 @@
+import time
+import tracemalloc
+
+
+class StageTimer:
+    # Wall time, CPU time and optionally peak traced memory per pipeline stage. Stages run back to
+    # back, so stop(stage) charges everything since the previous mark to stage and marks again.
+    # Streamed stages run once per chunk and add up. Throughput is over what each stage processed,
+    # qubits for the pulse stages and key bits for reconciliation and privacy amplification.
+    def __init__(self, n_bits, trace_memory=False):
+        self.n_bits = n_bits
+        self.trace_memory = trace_memory
+        self._started_tracing = False
+        self._stages = {}
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        self.start()
+
+    def start(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+
+    def stop(self, stage, size=None, unit="Qubits"):
+        # size is how much the stage processed since the last mark, n_bits if omitted
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak = tracemalloc.get_traced_memory()[1] - self._memory if self.trace_memory else None
+
+        totals = self._stages.setdefault(stage, {"wall": 0.0, "cpu": 0.0, "peak": None, "size": 0, "unit": unit})
+        totals["wall"] += wall
+        totals["cpu"] += cpu
+        totals["size"] += self.n_bits if size is None else size
+        if peak is not None:
+            totals["peak"] = max(totals["peak"] or 0, peak)
+
+        self.start()
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def results(self):
+        return {
+            stage: {
+                "Wall time (s)": totals["wall"],
+                "CPU time (s)": totals["cpu"],
+                "Peak memory (bytes)": totals["peak"],
+                totals["unit"] + "/s": totals["size"]/totals["wall"] if totals["wall"] > 0 else None
+            }
+            for stage, totals in self._stages.items()
+        }
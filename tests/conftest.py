@@ -0,0 +1,42 @@
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+
+# The modules import each other by bare name from src, as when run from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Lookup tables and cached results go to a scratch directory instead of the user's cache. lookup
+# reads the variable on import, so it is set before any test module imports it.
+CACHE_DIR = tempfile.mkdtemp(prefix="qkd-tests-")
+os.environ["QKD_CACHE_DIR"] = CACHE_DIR
+
+from lookup import LookupTable
+from system import System
+
+# The CLI defaults, on the analytic engine
+SYSTEM_PARAMETERS = dict(protocol="BB84", fiber_length=18, fiber_loss=0.53, perturb_probability=0.05, generation_rate=72.6e6,
+                         uncertainty_mean=0.13, detector_efficiency=0.11, source_efficiency=0.058, engine="analytic")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def system_parameters():
+    return dict(SYSTEM_PARAMETERS)
+
+
+@pytest.fixture
+def make_system(tmp_path):
+    # A System from the shared parameters, any of them overridden by keyword. A lookup engine
+    # keeps its table under the test's own tmp_path.
+    def make_system(protocol, **parameters):
+        system = System(**dict(SYSTEM_PARAMETERS, protocol=protocol, **parameters))
+        if isinstance(system._executor, LookupTable):
+            system._executor.cache_path = str(tmp_path/"lookup.pkl")
+        return system
+
+    return make_system
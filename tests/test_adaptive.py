@@ -0,0 +1,57 @@
+import math
+import numpy as np
+import pytest
+from adaptive import AdaptiveRuns, RunningStats, t_quantile
+
+SIMULATE_PARAMETERS = dict(n_bits=2000, perturb=True, cross_check_fraction=0.2)
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(3, 2, 1000)
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+
+    assert stats.n == 1000
+    assert stats.mean == pytest.approx(np.mean(values), rel=1e-12)
+    assert stats.variance == pytest.approx(np.var(values, ddof=1), rel=1e-12)
+
+
+def test_half_width_needs_two_values():
+    stats = RunningStats()
+    stats.add(1.0)
+    assert stats.half_width() == math.inf
+
+    stats.add(3.0)
+    # Standard deviation sqrt(2) over sqrt(2) values, times t(0.975, 1)
+    assert stats.half_width() == pytest.approx(12.7062, rel=1e-4)
+
+
+@pytest.mark.parametrize("dof, quantile", [(1, 12.7062), (3, 3.18245), (4, 2.77645), (10, 2.22814), (100, 1.98397)])
+def test_t_quantile_table(dof, quantile):
+    assert t_quantile(0.975, dof) == pytest.approx(quantile, abs=1e-4)
+
+
+def widths(system_parameters, target_width, min_runs=3, max_runs=8):
+    # Interval width after every finished run, from one worker so runs finish in order
+    runs = AdaptiveRuns(system_parameters, SIMULATE_PARAMETERS, "QBER", target_width, min_runs=min_runs, max_runs=max_runs, max_workers=1, seed=2)
+    return [2*stats.half_width() for i, result, stats in runs.run()]
+
+
+def test_stops_at_min_runs(system_parameters):
+    assert len(widths(system_parameters, math.inf)) == 3
+
+
+def test_stops_at_max_runs(system_parameters):
+    assert len(widths(system_parameters, 0)) == 8
+
+
+def test_stops_once_the_interval_is_narrow(system_parameters):
+    # Aim between the width after the third run and the one at max_runs
+    full = widths(system_parameters, 0, max_runs=12)
+    target = (full[2] + full[-1])/2
+    stopped = widths(system_parameters, target, max_runs=12)
+
+    assert 3 < len(stopped) < 12
+    assert stopped[-1] <= target
+    assert all(width > target for width in stopped[2:-1])
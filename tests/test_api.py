@@ -0,0 +1,43 @@
+import csv
+import json
+import api
+import cli
+
+
+def test_csv_takes_columns_from_every_row(tmp_path):
+    rows = [
+        {"Sweep value": 0, "QBER": None, "Timings": {"encode": {"Wall time (s)": 1.0}}},
+        {"Sweep value": 10, "QBER": 0.1, "Timings": {"encode": {"Wall time (s)": 2.0}, "reconciliation": {"Wall time (s)": 3.0}}}
+    ]
+    path = str(tmp_path/"results.csv")
+    api.write_results(rows, path)
+
+    with open(path, newline="") as f:
+        written = list(csv.DictReader(f))
+
+    assert list(written[0]) == ["Sweep value", "QBER", "Timings encode Wall time (s)", "Timings reconciliation Wall time (s)"]
+    assert written[0]["Timings reconciliation Wall time (s)"] == ""
+    assert written[1]["Timings reconciliation Wall time (s)"] == "3.0"
+
+
+def test_sweep_with_reconciliation_to_csv(tmp_path, system_parameters):
+    # A zero cross check fraction leaves the first point without QBER and reconciliation
+    simulate_parameters = dict(n_bits=2000, perturb=True, reconciliation="cascade")
+    rows = api.sweep(system_parameters, simulate_parameters, "Cross check fraction", [0, 10, 20], max_workers=1, seed=1)
+
+    path = str(tmp_path/"sweep.csv")
+    api.write_results(rows, path)
+
+    with open(path, newline="") as f:
+        assert len(list(csv.DictReader(f))) == 3
+
+
+def test_cli_sweeps_generation_rate_in_mhz(capsys):
+    # A swept rate is in MHz like --generation-rate
+    common = ["--qubits", "1000", "--engine", "analytic", "--seed", "2", "--workers", "1"]
+    cli.main(common + ["--generation-rate", "10"])
+    single = json.loads(capsys.readouterr().out)[0]
+    cli.main(common + ["--sweep", "Source generation rate", "--start", "10", "--end", "10", "--points", "1"])
+    swept = json.loads(capsys.readouterr().out)[0]
+
+    assert single["Qubit generation rate (Hz)"] == swept["Qubit generation rate (Hz)"] == 10e6
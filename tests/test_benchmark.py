@@ -0,0 +1,31 @@
+import json
+import pytest
+import benchmark
+
+
+def report(seconds):
+    return {"results": [{"protocol": "BB84", "n_bits": 1000, "stage": stage, "seconds": s} for stage, s in seconds.items()]}
+
+
+def test_compare_flags_only_slowdowns_past_tolerance():
+    baseline = report({"encode": 0.1, "measure": 0.1, "cross_check": 1e-5})
+    current = report({"encode": 0.14, "measure": 0.2, "cross_check": 1e-4})
+
+    # cross_check got ten times slower but stays under the noise floor
+    regressions = benchmark.compare(current, baseline, 1.5)
+    assert [row["stage"] for row in regressions] == ["measure"]
+    assert regressions[0]["baseline_seconds"] == 0.1 and regressions[0]["ratio"] == pytest.approx(2)
+    assert benchmark.compare(current, baseline, 2.5) == []
+
+
+@pytest.mark.parametrize("seconds, status", [(0.12, 0), (0.3, 1)])
+def test_compare_sets_the_exit_status(seconds, status, tmp_path, monkeypatch, capsys):
+    path = tmp_path/"baseline.json"
+    path.write_text(json.dumps(report({"encode": 0.1})))
+    monkeypatch.setattr(benchmark, "benchmark", lambda *args: report({"encode": seconds}))
+
+    with pytest.raises(SystemExit) as exit:
+        benchmark.main(["--compare", str(path)])
+
+    assert exit.value.code == status
+    assert "{} regressions".format(status) in capsys.readouterr().out
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from bits import Bits
+
+
+def random_bits(rng, n, shape=()):
+    return rng.integers(2, size=(n,) + shape).astype(np.uint8)
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 8, 9, 1000, 1003])
+def test_pack_unpack(n):
+    bits = random_bits(np.random.default_rng(n), n)
+    packed = Bits.pack(bits)
+
+    assert len(packed) == n
+    assert np.array_equal(packed.unpack(), bits)
+    assert np.array_equal(packed.mask(), bits.astype(bool))
+    assert packed.count() == bits.sum()
+
+
+def test_pair_data():
+    bits = random_bits(np.random.default_rng(0), 101, (2,))
+    packed = Bits.pack(bits)
+
+    assert np.array_equal(packed.unpack(), bits)
+    assert np.array_equal(packed[5], bits[5])
+    assert np.array_equal(packed[bits[:, 0] == 1].unpack(), bits[bits[:, 0] == 1])
+
+
+def test_indexing_and_xor():
+    rng = np.random.default_rng(1)
+    a = random_bits(rng, 1001)
+    b = random_bits(rng, 1001)
+    mask = rng.random(1001) < 0.3
+    index = rng.choice(1001, 50, replace=False)
+
+    assert [Bits.pack(a)[i] for i in range(1001)] == a.tolist()
+    assert np.array_equal(Bits.pack(a)[mask].unpack(), a[mask])
+    assert np.array_equal(Bits.pack(a)[index].unpack(), a[index])
+    assert np.array_equal(Bits.pack(a)[10:20].unpack(), a[10:20])
+    assert np.array_equal((Bits.pack(a) ^ Bits.pack(b)).unpack(), a ^ b)
+    assert (Bits.pack(a) ^ Bits.pack(b)).count() == np.count_nonzero(a != b)
+
+
+def test_negative_and_out_of_range_index():
+    # The last bit sits before the padding of its byte
+    bits = Bits.pack([0, 0, 0, 0, 1])
+    assert [bits[-i] for i in range(1, 6)] == [1, 0, 0, 0, 0]
+
+    for index in (5, 8, -6):
+        with pytest.raises(IndexError):
+            bits[index]
+
+
+def test_random_padding_is_zero():
+    bits = Bits.random(13, np.random.default_rng(2))
+    assert bits.packed[-1] & 0b111 == 0
+    assert np.array_equal(Bits.pack(bits.unpack()).packed, bits.packed)
+
+
+@pytest.mark.parametrize("shape", [(), (2,)])
+def test_concatenate(shape):
+    rng = np.random.default_rng(3)
+    parts = [random_bits(rng, n, shape) for n in (0, 5, 8, 3, 0, 13, 16, 1, 250, 7)]
+    joined = Bits.concatenate([Bits.pack(part) for part in parts])
+
+    assert len(joined) == sum(len(part) for part in parts)
+    assert np.array_equal(joined.unpack(), np.concatenate(parts))
+    assert np.array_equal(joined.packed, Bits.pack(np.concatenate(parts)).packed)
+
+
+def test_concatenate_nothing():
+    assert len(Bits.concatenate([])) == 0
@@ -0,0 +1,70 @@
+import api
+from cache import ResultCache
+
+SIMULATE_PARAMETERS = dict(n_bits=1000, cross_check_fraction=0.1)
+
+
+def test_unseeded_sweep_is_not_cached(tmp_path, system_parameters):
+    cache = ResultCache(str(tmp_path/"results.sqlite"))
+    api.sweep(system_parameters, SIMULATE_PARAMETERS, "Fiber length", [0, 10], max_workers=1, cache=cache)
+    assert len(cache) == 0
+
+
+def test_seeded_sweep_is_replayed(tmp_path, system_parameters):
+    cache = ResultCache(str(tmp_path/"results.sqlite"))
+    first = api.sweep(system_parameters, SIMULATE_PARAMETERS, "Fiber length", [0, 10], max_workers=1, seed=4, cache=cache)
+    assert len(cache) == 2
+
+    second = api.sweep(system_parameters, SIMULATE_PARAMETERS, "Fiber length", [0, 10], max_workers=1, seed=4, cache=cache)
+    assert [row["Key length"] for row in second] == [row["Key length"] for row in first]
+    assert [row["QBER"] for row in second] == [row["QBER"] for row in first]
+
+
+def test_cached_results_have_no_timings(tmp_path, system_parameters):
+    cache = ResultCache(str(tmp_path/"results.sqlite"))
+    system_parameters["seed"] = 9
+
+    fresh = api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+    cached = api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+
+    assert "Timings" in fresh and "Cached" not in fresh
+    assert "Timings" not in cached and cached["Cached"] is True
+    assert cached["Key length"] == fresh["Key length"]
+
+
+def test_profiling_options_share_the_key(tmp_path, system_parameters):
+    cache = ResultCache(str(tmp_path/"results.sqlite"))
+    system_parameters["seed"] = 9
+
+    fresh = api.simulate(system_parameters, dict(SIMULATE_PARAMETERS, trace_memory=True), cache)
+    cached = api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+
+    assert len(cache) == 1
+    assert cached["Cached"] is True and cached["Key length"] == fresh["Key length"]
+
+
+def test_profiled_run_is_not_skipped(tmp_path, system_parameters):
+    cache = ResultCache(str(tmp_path/"results.sqlite"))
+    system_parameters["seed"] = 9
+    api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+
+    profile_path = tmp_path/"run.prof"
+    profiled = api.simulate(system_parameters, dict(SIMULATE_PARAMETERS, profile_path=str(profile_path)), cache)
+
+    assert "Cached" not in profiled and "Timings" in profiled
+    assert profile_path.exists()
+
+
+def test_unseeded_run_is_replayed_from_its_seed(tmp_path, system_parameters):
+    # An unseeded run reports its 128-bit entropy, which replays it through the cache
+    cache = ResultCache(str(tmp_path/"results.sqlite"))
+    fresh = api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+    assert len(cache) == 0 and fresh["Seed"] >= 2**63
+
+    system_parameters["seed"] = fresh["Seed"]
+    replayed = api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+    cached = api.simulate(system_parameters, SIMULATE_PARAMETERS, cache)
+
+    assert replayed["Key length"] == fresh["Key length"]
+    assert cached["Cached"] is True and cached["Key length"] == fresh["Key length"]
+    assert cache.query(["Key length"], seed=fresh["Seed"])["Key length"] == [fresh["Key length"]]
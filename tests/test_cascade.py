@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from bits import Bits
+from cascade import Cascade
+from ldpc import LDPC
+
+
+def noisy_keys(n, qber, seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(2, size=n).astype(np.uint8)
+    b = a ^ (rng.random(n) < qber).astype(np.uint8)
+    return Bits.pack(a), Bits.pack(b)
+
+
+def scalar_bisect(errors, order, k, block):
+    # One block at a time, the textbook binary search on the parity of the left half
+    n = len(errors)
+    low, high = block*k, min(block*k + k, n)
+    revealed = 0
+    while high - low > 1:
+        middle = (low + high)//2
+        revealed += 1
+        if errors[order[low:middle]].sum() % 2:
+            high = middle
+        else:
+            low = middle
+    return order[low], revealed
+
+
+@pytest.mark.parametrize("k", [2, 7, 16, 33])
+def test_bisect_matches_scalar_search(k):
+    rng = np.random.default_rng(k)
+    n = 1000
+    errors = (rng.random(n) < 0.05).astype(np.uint8)
+    order = rng.permutation(n)
+
+    blocks = np.arange(0, n, k)
+    odd = np.flatnonzero(np.bitwise_xor.reduceat(errors[order], blocks))
+
+    cascade = Cascade()
+    found = cascade.bisect(errors, order, k, odd)
+    expected = [scalar_bisect(errors, order, k, block) for block in odd]
+
+    assert found.tolist() == [position for position, revealed in expected]
+    assert cascade.leaked_bits == sum(revealed for position, revealed in expected)
+    assert errors[found].all()
+
+
+@pytest.mark.parametrize("qber", [0.01, 0.03, 0.05, 0.08])
+def test_reconcile_corrects_every_error(qber):
+    a_key, b_key = noisy_keys(20000, qber, 1)
+    cascade = Cascade(rng=2)
+    corrected = cascade.reconcile(a_key, b_key, qber)
+
+    assert (a_key ^ corrected).count() == 0
+    assert cascade.rounds == cascade.passes
+    assert 20000*LDPC.entropy(qber) < cascade.leaked_bits < 1.5*20000*LDPC.entropy(qber)
+
+
+def test_reconcile_repeats_for_a_seed():
+    a_key, b_key = noisy_keys(5000, 0.05, 3)
+    first, second = Cascade(rng=4), Cascade(rng=4)
+
+    assert np.array_equal(first.reconcile(a_key, b_key, 0.05).packed, second.reconcile(a_key, b_key, 0.05).packed)
+    assert first.leaked_bits == second.leaked_bits
+
+
+def test_reconcile_equal_and_empty_keys():
+    a_key, b_key = noisy_keys(1000, 0, 5)
+    assert (Cascade(rng=6).reconcile(a_key, b_key, 0.0) ^ a_key).count() == 0
+
+    cascade = Cascade(passes=3)
+    assert len(cascade.reconcile(Bits.pack([]), Bits.pack([]), 0.05)) == 0
+    assert cascade.rounds == 0 and cascade.leaked_bits == 0
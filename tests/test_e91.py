@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from bits import Bits
+from e91 import E91
+
+
+def measured_system(make_system, seed, perturb, eavesdrop):
+    system = make_system("E91", perturb_probability=0.2, seed=seed)
+    if not perturb:
+        system._perturb_probability = 0
+    system._n_bits = 20000
+    system.encode()
+    system.mess_with()
+    if eavesdrop:
+        system.eavesdrop()
+    system.measure()
+    return system
+
+
+def list_statistic(system):
+    # The four-pass list counting E91 used before the bincount version
+    counts = []
+    measured = system._measured.unpack()
+    for a, b in [(0, 1), (0, 3), (2, 1), (2, 3)]:
+        measurements = [list(measured[i]) for i, (a_base, b_base) in enumerate(zip(system._a_bases, system._b_bases)) if a_base == a and b_base == b]
+        counts.append([measurements.count(outcome) for outcome in ([0, 0], [0, 1], [1, 0], [1, 1])])
+    counts = np.array(counts)
+
+    N00, N01, N10, N11 = counts.T
+    E = (N11 + N00 - N01 - N10)/counts.sum(axis=1)
+    return E[0] - E[1] + E[2] + E[3]
+
+
+@pytest.mark.parametrize("seed, perturb, eavesdrop", [(1, False, False), (2, True, False), (3, True, True)])
+def test_bincount_matches_list_counting(seed, perturb, eavesdrop, make_system):
+    system = measured_system(make_system, seed, perturb, eavesdrop)
+    assert E91.test_statistic(system) == pytest.approx(list_statistic(system), abs=1e-12)
+
+
+def test_tables_accumulate_over_chunks(make_system):
+    system = measured_system(make_system, 4, True, False)
+    measured = system._measured.unpack()
+
+    total = None
+    for start in range(0, 20000, 3001):
+        chunk = SimpleNamespace(
+            _measured=Bits.pack(measured[start:start + 3001]),
+            _a_bases=system._a_bases[start:start + 3001],
+            _b_bases=system._b_bases[start:start + 3001]
+        )
+        counts = E91.statistic_counts(chunk)
+        total = counts if total is None else total + counts
+
+    assert np.array_equal(total, E91.statistic_counts(system))
+    assert E91.test_statistic(system, total) == E91.test_statistic(system)
+
+
+def test_correlators_of_ideal_pairs(make_system):
+    E = E91.correlators(E91.statistic_counts(measured_system(make_system, 5, False, False)))
+    # E(a, b) = cos(pi (a - b)/4) for analyzers a, b in units of pi/8, Bob's codes start at 1
+    expected = np.cos(np.pi*(np.arange(3)[:, None] - np.arange(1, 4)[None, :])/4)
+    assert np.allclose(E, expected, atol=0.06)
+
+
+def test_reused_system_forgets_the_last_run(make_system):
+    # Nothing gets through at 200 km, S must not come from the earlier run at 5 km
+    system = make_system("E91", fiber_length=5, seed=1)
+    assert system.simulate(100000, losses=True)["S"] is not None
+
+    system.set_parameter("Fiber length", 200)
+    results = system.simulate(100000, losses=True)
+
+    assert results["Number of bits sent"] == 0
+    assert results["Key length"] == 0
+    assert results["S"] is None
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from sweep import ExpectedSweep
+
+PROTOCOLS = ["BB84", "B92", "BBM92", "E91"]
+
+
+@pytest.mark.parametrize("perturb, add_uncertainty, eavesdrop, losses", [
+    (True, False, False, False),
+    (False, True, False, False),
+    (True, True, False, True),
+    (True, True, True, True)
+])
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_expected_matches_a_large_run(protocol, perturb, add_uncertainty, eavesdrop, losses, make_system):
+    # Efficient detectors over 5 km keep most pulses, so the sampled run is large enough to pin the
+    # expected values down to a few standard errors
+    system_parameters = dict(fiber_length=5, perturb_probability=0.2, uncertainty_mean=0.3, detector_efficiency=0.9, source_efficiency=0.9)
+    simulate_parameters = dict(n_bits=400000, perturb=perturb, add_uncertainty=add_uncertainty, eavesdrop=eavesdrop, losses=losses, cross_check_fraction=0.5)
+
+    expected = make_system(protocol, **system_parameters).expected(**simulate_parameters)
+    results = make_system(protocol, seed=3, **system_parameters).simulate(**simulate_parameters)
+
+    sent = expected["Number of bits sent"]
+    loss = 1 - sent/400000
+    assert abs(results["Number of bits sent"] - sent) < 5*np.sqrt(400000*loss*(1 - loss)) + 1
+    assert abs(results["Key length"] - expected["Key length"]) < 5*np.sqrt(expected["Key length"]) + 2
+
+    # Half the sifted key is checked, about as many bits as are kept
+    qber = expected["QBER"]
+    assert abs(results["QBER"] - qber) < 5*np.sqrt(qber*(1 - qber)/expected["Key length"]) + 1e-3
+
+    if protocol == "E91":
+        # Each of the four correlators comes from about a ninth of the received pairs
+        assert abs(results["S"] - expected["S"]) < 5*np.sqrt(4*9/sent)
+    else:
+        assert results["S"] is None and expected["S"] is None
+
+
+@pytest.mark.parametrize("x_param_name, x_param_values", [("Fiber length", [0, 10, 25]), ("Cross check fraction", [0, 20, 50]), ("SOP mean deviation", [0, 0.1, 0.3])])
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_expected_sweep_matches_points(protocol, x_param_name, x_param_values, system_parameters, make_system):
+    system_parameters["protocol"] = protocol
+    simulate_parameters = dict(n_bits=10000, perturb=True, add_uncertainty=True, losses=True, cross_check_fraction=0.1)
+
+    rows = list(ExpectedSweep(system_parameters, simulate_parameters, x_param_name, x_param_values).run())
+    assert [(i, x) for i, x, row in rows] == list(enumerate(x_param_values))
+
+    for i, x_param_value, row in rows:
+        # The same point as a scalar parameter
+        system = make_system(protocol)
+        point_parameters = dict(simulate_parameters)
+        if x_param_name == "Cross check fraction":
+            point_parameters["cross_check_fraction"] = x_param_value/100
+        else:
+            system.set_parameter(x_param_name, x_param_value)
+        point = system.expected(**point_parameters)
+
+        assert set(row) == set(point)
+        for key, value in point.items():
+            if isinstance(value, (int, float, np.floating)) and not isinstance(value, bool):
+                assert row[key] == pytest.approx(value, rel=1e-12), key
+            else:
+                assert row[key] == value, key
+
+
+def test_zero_cross_check_estimates_no_qber(make_system):
+    system = make_system("BB84", seed=5)
+    expected = system.expected(2000, perturb=True, cross_check_fraction=0)
+    sampled = system.simulate(2000, perturb=True, cross_check_fraction=0)
+
+    assert expected["QBER"] is None and sampled["QBER"] is None
+    assert expected["Key length"] == pytest.approx(sampled["Key length"], rel=0.1)
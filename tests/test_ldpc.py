@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from bits import Bits
+from ldpc import LDPC
+from test_cascade import noisy_keys
+
+
+@pytest.mark.parametrize("check_degree", [4, 8, 16])
+def test_code_is_regular_and_simple(check_degree):
+    n = check_degree*256
+    variables, by_variable, m = LDPC.code(n, check_degree)
+
+    assert m == n*LDPC.VARIABLE_DEGREE//check_degree
+    assert np.array_equal(np.bincount(variables, minlength=n), np.full(n, LDPC.VARIABLE_DEGREE))
+    rows = np.sort(variables.reshape(m, check_degree), axis=1)
+    assert not (rows[:, 1:] == rows[:, :-1]).any()
+    assert np.array_equal(variables[by_variable], np.sort(variables))
+
+
+def test_code_cache_keeps_recent_codes():
+    # Frames of many lengths do not pile up codes
+    for n in range(1000, 1000 + 4*(LDPC.CODE_CACHE_SIZE + 2), 4):
+        LDPC.code(n, 4)
+    assert len(LDPC._codes) == LDPC.CODE_CACHE_SIZE
+    assert (n, 4) in LDPC._codes
+
+    # A cached code is the same as a rebuilt one
+    variables = LDPC.code(n, 4)[0]
+    LDPC._codes.clear()
+    assert np.array_equal(LDPC.code(n, 4)[0], variables)
+
+
+@pytest.mark.parametrize("qber", [0.01, 0.03, 0.05])
+def test_reconcile_corrects_every_error(qber):
+    a_key, b_key = noisy_keys(20000, qber, 1)
+    ldpc = LDPC()
+    corrected = ldpc.reconcile(a_key, b_key, qber)
+
+    assert (a_key ^ corrected).count() == 0
+    assert ldpc.leaked_bits > 20000*LDPC.entropy(qber)
+    assert ldpc.rounds >= 1
+
+
+def test_reconcile_is_deterministic():
+    # The code comes from a fixed seed and decoding draws nothing, Alice and Bob agree on it
+    a_key, b_key = noisy_keys(8000, 0.04, 2)
+    first, second = LDPC(), LDPC()
+
+    assert np.array_equal(first.reconcile(a_key, b_key, 0.04).packed, second.reconcile(a_key, b_key, 0.04).packed)
+    assert first.leaked_bits == second.leaked_bits
+
+
+def test_reconcile_empty_keys():
+    assert len(LDPC().reconcile(Bits.pack([]), Bits.pack([]), 0.05)) == 0
+
+
+@pytest.mark.parametrize("n_bits, check_degree, frame", [(20000, 7, 20006), (1 << 16, 4, 1 << 16), (200000, 6, 50004)])
+def test_frames_split_the_key_evenly(n_bits, check_degree, frame):
+    ldpc = LDPC()
+    assert ldpc.frame_size(n_bits, check_degree) == frame
+    assert frame % check_degree == 0 and frame <= ldpc.block_size + check_degree
+
+
+@pytest.mark.parametrize("check_degree", [4, 8, 14, 20, 30])
+def test_each_degree_converges_below_its_threshold(check_degree):
+    qber = LDPC.BACKOFF*LDPC.THRESHOLDS[check_degree]
+    a_key, b_key = noisy_keys(1 << 17, qber, check_degree)
+    ldpc = LDPC()
+    corrected = ldpc.reconcile(a_key, b_key, qber)
+
+    assert ldpc.check_degree(qber) == check_degree
+    assert (a_key ^ corrected).count() == 0
+    assert ldpc.rounds == 1
+    frame = ldpc.frame_size(1 << 17, check_degree)
+    assert ldpc.leaked_bits == -(-(1 << 17)//frame)*frame*LDPC.VARIABLE_DEGREE//check_degree
+
+
+@pytest.mark.parametrize("qber, efficiency", [(0.005, 2.3), (0.01, 1.9)])
+def test_low_qber_reconciles_in_one_round(qber, efficiency):
+    a_key, b_key = noisy_keys(1 << 18, qber, 3)
+    ldpc = LDPC()
+    corrected = ldpc.reconcile(a_key, b_key, qber)
+
+    assert (a_key ^ corrected).count() == 0
+    assert ldpc.rounds == 1
+    assert ldpc.leaked_bits < efficiency*(1 << 18)*LDPC.entropy(qber)
+
+
+@pytest.mark.parametrize("reconciliation", ["cascade", "ldpc"])
+def test_whole_key_cross_check_leaves_nothing_to_reconcile(reconciliation, make_system):
+    results = make_system("BB84", seed=1).simulate(2000, perturb=True, cross_check_fraction=1.0, reconciliation=reconciliation, privacy_amplification=True)
+
+    assert results["Key length"] == 0
+    assert results["Leaked bits"] == 0 and results["Reconciliation efficiency"] is None
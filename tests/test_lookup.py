@@ -0,0 +1,27 @@
+import numpy as np
+from lookup import LookupTable
+
+
+def test_unreadable_table_is_empty(tmp_path):
+    path = tmp_path/"lookup.pkl"
+    path.write_bytes(b"\x80\x04\x95")
+
+    table = LookupTable(cache_path=str(path))
+    table.load()
+    assert table._disk == {}
+
+
+def test_save_keeps_entries_of_other_processes(tmp_path):
+    # Two tables sharing a file, as two sweep workers do, each store one entry
+    path = str(tmp_path/"lookup.pkl")
+    first, second = LookupTable(cache_path=path), LookupTable(cache_path=path)
+    first.load()
+    second.load()
+
+    first._disk["a"], first._disk_changed = np.array([1.0]), True
+    second._disk["b"], second._disk_changed = np.array([0.5, 0.5]), True
+    first.save()
+    second.save()
+
+    assert sorted(LookupTable.read(path)) == ["a", "b"]
+    assert list(tmp_path.iterdir()) == [tmp_path/"lookup.pkl"]
@@ -0,0 +1,35 @@
+import pytest
+import api
+
+PROTOCOLS = ["BB84", "B92", "BBM92", "E91"]
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_nothing_received(protocol, make_system):
+    # At 100 km essentially no pulse out of a thousand gets through
+    results = make_system(protocol, fiber_length=100, seed=1).simulate(1000, perturb=True, cross_check_fraction=0.1, losses=True, reconciliation="cascade", privacy_amplification=True)
+
+    assert results["Number of bits sent"] == 0
+    assert results["Key length"] == 0
+    assert results["Key rate"] == 0
+    assert results["QBER"] is None
+    assert results["S"] is None
+    assert results["Final key length"] is None
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_few_received(protocol, make_system):
+    results = make_system(protocol, fiber_length=10, seed=1).simulate(20000, cross_check_fraction=0.1, losses=True)
+
+    assert 0 < results["Number of bits sent"] < 100
+    assert results["Lost at source"] + results["Lost in fiber"] + results["Lost at detectors"] + results["Number of bits sent"] == 20000
+
+
+def test_sweep_into_total_loss(system_parameters):
+    system_parameters.update(protocol="E91", fiber_length=0)
+    simulate_parameters = dict(n_bits=1000, cross_check_fraction=0.1, losses=True)
+
+    rows = api.sweep(system_parameters, simulate_parameters, "Fiber length", [0, 25, 50], max_workers=1, seed=3)
+
+    assert [row["Sweep value"] for row in rows] == [0, 25, 50]
+    assert rows[-1]["Key length"] == 0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from bits import Bits
+from privacy import PrivacyAmplification
+
+
+def dense_toeplitz(seed, n, length):
+    # T[i, j] = seed[i - j + n - 1], the row i is seed[i:i + n] reversed
+    i, j = np.indices((length, n))
+    return seed[i - j + n - 1]
+
+
+@pytest.mark.parametrize("n, length, block_size", [(300, 120, 64), (1000, 700, 128), (257, 300, 50), (100, 40, 1 << 16), (1000, 700, None)])
+def test_hash_is_one_toeplitz_product(n, length, block_size):
+    rng = np.random.default_rng(n)
+    keys = [Bits.pack(rng.integers(2, size=n)) for i in range(2)]
+
+    hashed = PrivacyAmplification(block_size=block_size, rng=7).hash(keys, length)
+
+    # The same generator state gives the seed the hash drew
+    seed = Bits.random(n + length - 1, np.random.default_rng(7)).unpack().astype(np.int64)
+    matrix = dense_toeplitz(seed, n, length)
+    for key, result in zip(keys, hashed):
+        assert len(result) == length
+        assert np.array_equal(result.unpack(), (matrix @ key.unpack().astype(np.int64)) % 2)
+
+
+def test_equal_keys_hash_equally():
+    key = Bits.random(5000, np.random.default_rng(0))
+    a, b = PrivacyAmplification(block_size=1024, rng=1).hash([key, key], 2000)
+    assert np.array_equal(a.unpack(), b.unpack())
+
+
+@pytest.mark.parametrize("block_size", [None, 1 << 16])
+def test_large_key_fft_sizes(block_size, monkeypatch):
+    # One transform of the seed and one per key, none past twice n + length. A block size caps
+    # every transform at twice the block instead.
+    sizes = []
+    rfft = np.fft.rfft
+
+    def recording_rfft(a, n=None):
+        sizes.append(n)
+        return rfft(a, n)
+
+    monkeypatch.setattr(np.fft, "rfft", recording_rfft)
+    n, length = 1 << 20, 1 << 19
+    rng = np.random.default_rng(3)
+    keys = [Bits.random(n, rng) for i in range(2)]
+    hashed = PrivacyAmplification(block_size=block_size, rng=5).hash(keys, length)
+
+    if block_size is None:
+        assert len(sizes) == 3 and max(sizes) < 2*(n + length)
+    else:
+        assert max(sizes) <= 2*block_size
+
+    # Spot check rows against the dot product with seed[i:i + n] reversed
+    seed = Bits.random(n + length - 1, np.random.default_rng(5)).unpack().astype(np.int64)
+    for i in rng.choice(length, 10):
+        row = seed[i:i + n][::-1]
+        for key, result in zip(keys, hashed):
+            assert result[i] == (row @ key.unpack()) % 2
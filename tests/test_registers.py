@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+PROTOCOLS = ["BB84", "B92", "BBM92", "E91"]
+ENGINES = ["analytic", "statevector", "lookup", "aer"]
+
+# A channel noisy enough that the engines' error rates differ measurably
+NOISE = dict(perturb_probability=0.2, uncertainty_mean=0.3, seed=11)
+NOISY_RUN = dict(perturb=True, add_uncertainty=True, eavesdrop=True, cross_check_fraction=0.5)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_ideal_channel_has_no_errors(protocol, engine, make_system):
+    if engine in ("lookup", "aer"):
+        pytest.importorskip("qiskit_aer")
+
+    results = make_system(protocol, engine=engine, **NOISE).simulate(2000, cross_check_fraction=0.5)
+    assert results["QBER"] == 0
+    if protocol == "E91":
+        assert results["S"] == pytest.approx(2*np.sqrt(2), abs=0.3)
+
+
+@pytest.mark.parametrize("engine", ["statevector", "aer"])
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_engines_agree_with_analytic(protocol, engine, make_system):
+    if engine == "aer":
+        pytest.importorskip("qiskit_aer")
+
+    # Different engines draw differently, their QBER and S agree within sampling error
+    n_bits = 4000 if engine == "aer" else 20000
+    reference = make_system(protocol, **NOISE).simulate(20000, **NOISY_RUN)
+    results = make_system(protocol, engine=engine, **NOISE).simulate(n_bits, **NOISY_RUN)
+
+    # Half the sifted key is checked, about as many bits as are kept
+    tolerance = 5*np.sqrt(0.25/results["Key length"] + 0.25/reference["Key length"])
+    assert abs(results["QBER"] - reference["QBER"]) < tolerance
+    if protocol == "E91":
+        assert abs(results["S"] - reference["S"]) < 0.4
+
+
+@pytest.mark.parametrize("protocol", ["BB84", "E91"])
+def test_aer_results_do_not_depend_on_batch_size(protocol, make_system):
+    pytest.importorskip("qiskit_aer")
+
+    # Blocks are seeded at their offset into the tape, so any split gives one job's outcomes
+    systems = [make_system(protocol, perturb_probability=0.2, uncertainty_mean=0.3, engine="aer", batch_size=batch_size, seed=3) for batch_size in (37, 1024)]
+    results = [system.simulate(300, perturb=True, add_uncertainty=True, cross_check_fraction=0.5) for system in systems]
+
+    assert results[0]["QBER"] == results[1]["QBER"] and results[0]["S"] == results[1]["S"]
+    assert np.array_equal(systems[0]._a_key.unpack(), systems[1]._a_key.unpack())
+    assert np.array_equal(systems[0]._b_key.unpack(), systems[1]._b_key.unpack())
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+PROTOCOLS = ["BB84", "B92", "BBM92", "E91"]
+NOISE = dict(perturb_probability=0.3, uncertainty_mean=0.4, seed=5)
+
+
+def loop_keys(system):
+    # The per-pulse sifting loops the protocols used before the mask version
+    protocol = system._protocol.NAME
+    measured = system._measured.unpack()
+    a_key, b_key, sifted = [], [], []
+
+    if protocol == "B92":
+        for i, (base, measurement) in enumerate(zip(system._b_bases.unpack(), measured)):
+            if measurement == 1:
+                a_key.append(system._message[i])
+                b_key.append(1 - base)
+                sifted.append(i)
+    elif protocol == "BB84":
+        for i, (a_base, b_base) in enumerate(zip(system._a_bases.unpack(), system._b_bases.unpack())):
+            if a_base == b_base:
+                a_key.append(system._message[i])
+                b_key.append(measured[i])
+                sifted.append(i)
+    else:
+        a_bases = system._a_bases if protocol == "E91" else system._a_bases.unpack()
+        b_bases = system._b_bases if protocol == "E91" else system._b_bases.unpack()
+        for i, (a_base, b_base) in enumerate(zip(a_bases, b_bases)):
+            if a_base == b_base:
+                a_key.append(measured[i][0])
+                b_key.append(measured[i][1])
+                sifted.append(i)
+
+    return a_key, b_key, sifted
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_masks_match_loops(protocol, make_system):
+    system = make_system(protocol, **NOISE)
+    system._n_bits = 5000
+    system.encode()
+    system.mess_with()
+    system.eavesdrop()
+    system.measure()
+    system.find_keys()
+
+    a_key, b_key, sifted = loop_keys(system)
+
+    assert system._a_key.unpack().tolist() == a_key
+    assert system._b_key.unpack().tolist() == b_key
+    assert np.flatnonzero(system._sifted.unpack()).tolist() == sifted
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_sifted_mask_follows_key(protocol, make_system):
+    # A small budget streams the run through many chunks
+    system = make_system(protocol, memory_budget=200000, **NOISE)
+    results = system.simulate(20000, perturb=True, cross_check_fraction=0.2)
+
+    assert len(system._sifted) == 20000
+    assert system._sifted.count() == results["Key length"] == len(system._a_key)
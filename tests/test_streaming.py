@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("protocol", ["BB84", "E91"])
+def test_chunked_run_repeats_for_the_same_seed_and_budget(protocol, make_system):
+    a, b = [make_system(protocol, perturb_probability=0.2, seed=7, memory_budget=500000) for i in range(2)]
+    first = a.simulate(40000, perturb=True, cross_check_fraction=0.5)
+    second = b.simulate(40000, perturb=True, cross_check_fraction=0.5)
+
+    assert first["Key length"] == second["Key length"]
+    assert first["QBER"] == second["QBER"]
+    assert np.array_equal(a._a_key.packed, b._a_key.packed)
+
+
+@pytest.mark.parametrize("eavesdrop", [False, True])
+@pytest.mark.parametrize("engine", ["analytic", "statevector", "lookup"])
+@pytest.mark.parametrize("protocol", ["BB84", "B92", "BBM92", "E91"])
+def test_chunked_run_matches_monolithic(protocol, engine, eavesdrop, make_system):
+    # Every stream of draws runs on across the chunks, so chunking changes nothing
+    if engine == "lookup":
+        pytest.importorskip("qiskit_aer")
+    noisy = engine != "lookup"
+
+    a, b = [make_system(protocol, fiber_length=5, perturb_probability=0.2, detector_efficiency=0.9, source_efficiency=0.9, engine=engine, seed=7, memory_budget=memory_budget)
+            for memory_budget in (300000, None)]
+    chunked, monolithic = [system.simulate(40000, perturb=noisy, add_uncertainty=noisy, eavesdrop=eavesdrop, losses=True, cross_check_fraction=0.1,
+                                           reconciliation="cascade", privacy_amplification=True) for system in (a, b)]
+
+    assert a.chunk_size(chunked["Number of bits sent"]) % 64 == 0
+    assert a.chunk_size(chunked["Number of bits sent"]) < chunked["Number of bits sent"]
+    for field in ["Number of bits sent", "Key length", "QBER", "S", "Leaked bits", "Final key length"]:
+        assert chunked[field] == monolithic[field]
+    assert np.array_equal(a._sifted.packed, b._sifted.packed)
+    assert np.array_equal(a._a_key.packed, b._a_key.packed)
+    assert np.array_equal(a._b_key.packed, b._b_key.packed)
+    assert np.array_equal(a._a_secret.packed, b._a_secret.packed)
+
+
+def test_reused_system_repeats_its_runs(make_system):
+    system = make_system("BB84", perturb_probability=0.2, seed=7)
+    first = system.simulate(20000, perturb=True, cross_check_fraction=0.1, losses=True)
+    a_key = system._a_key
+    second = system.simulate(20000, perturb=True, cross_check_fraction=0.1, losses=True)
+
+    assert first["Seed"] == second["Seed"] == 7
+    assert first["Number of bits sent"] == second["Number of bits sent"]
+    assert np.array_equal(a_key.packed, system._a_key.packed)
+
+
+def test_reported_seed_replays_an_unseeded_run(make_system):
+    a = make_system("E91", perturb_probability=0.2)
+    first = a.simulate(40000, perturb=True, cross_check_fraction=0.5)
+    b = make_system("E91", seed=first["Seed"], perturb_probability=0.2)
+    second = b.simulate(40000, perturb=True, cross_check_fraction=0.5)
+
+    assert first["Seed"] is not None
+    assert second["Seed"] == first["Seed"]
+    assert first["S"] == second["S"]
+    assert np.array_equal(a._a_key.packed, b._a_key.packed)
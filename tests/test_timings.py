@@ -0,0 +1,10 @@
+def test_stage_throughput_is_over_stage_input(make_system):
+    system = make_system("BB84", seed=2)
+    results = system.simulate(20000, perturb=True, cross_check_fraction=0.1, losses=True, reconciliation="cascade", privacy_amplification=True)
+    timings = results["Timings"]
+
+    assert timings["loss"]["Qubits/s"] == 20000/timings["loss"]["Wall time (s)"]
+    assert timings["encode"]["Qubits/s"] == results["Number of bits sent"]/timings["encode"]["Wall time (s)"]
+    for stage in ("reconciliation", "privacy amplification"):
+        assert "Qubits/s" not in timings[stage]
+        assert timings[stage]["Key bits/s"] == results["Key length"]/timings[stage]["Wall time (s)"]